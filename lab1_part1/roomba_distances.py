@@ -0,0 +1,138 @@
+from __future__ import annotations
+from typing import List, Dict, Tuple, Iterable, Callable, Any
+import heapq
+
+from roomba_problem import Coordinate, Terrain, TRANSITION_COSTS, WALL, DIRTY_FLOOR, DIRTY_CARPET
+"""
+Exact maze distances for the roomba problems.
+
+The grid never changes between the states of one problem, so the true cost from any position
+to the nearest dirty spot can be computed once, by a single Dijkstra search backward from all the dirty spots,
+and then looked up in O(1) by every state that shares the same grid.
+
+Likewise for the manhattan distance to the nearest dirty spot, which ignores walls but is much cheaper to compute.
+
+Distance tables are flat lists indexed by cell (row * width + col), holding INF for walls and cells
+from which no target can be reached.
+"""
+
+INF = float('inf')
+
+Grid = Tuple[Tuple[Terrain, ...], ...]
+
+
+def maze_distances_to(grid : Grid, targets : Iterable[Coordinate]) -> List[float]:
+    """ Returns the table of the lowest costs to move from each cell to any of the targets.
+    As in RoombaState, moving onto a cell costs TRANSITION_COSTS of its terrain.
+    """
+    height, width = len(grid), len(grid[0])
+    terrain = [t for row in grid for t in row]
+    dist = [INF] * (height * width)
+    queue = []
+    for target in targets:
+        i = target.row * width + target.col
+        dist[i] = 0
+        queue.append((0, i))
+    heapq.heapify(queue)
+    while queue:
+        d, i = heapq.heappop(queue)
+        if d > dist[i]:
+            continue
+        # Any neighbor can move onto cell i, at the cost of i's terrain
+        nd = d + TRANSITION_COSTS[terrain[i]]
+        r, c = divmod(i, width)
+        for j in (i - width if r > 0 else -1, i + width if r < height - 1 else -1,
+                  i - 1 if c > 0 else -1, i + 1 if c < width - 1 else -1):
+            if j >= 0 and terrain[j] != WALL and nd < dist[j]:
+                dist[j] = nd
+                heapq.heappush(queue, (nd, j))
+    return dist
+
+
+def maze_paths_from(grid : Grid, source : Coordinate) -> Tuple[List[float], List[int]]:
+    """ Dijkstra's search forward from source. Returns the table of lowest costs to move from source to each cell,
+    and the table of each cell's predecessor on a cheapest path from source (-1 for source and unreached cells).
+    """
+    height, width = len(grid), len(grid[0])
+    terrain = [t for row in grid for t in row]
+    dist = [INF] * (height * width)
+    previous = [-1] * (height * width)
+    start = source.row * width + source.col
+    dist[start] = 0
+    queue = [(0, start)]
+    while queue:
+        d, i = heapq.heappop(queue)
+        if d > dist[i]:
+            continue
+        r, c = divmod(i, width)
+        for j in (i - width if r > 0 else -1, i + width if r < height - 1 else -1,
+                  i - 1 if c > 0 else -1, i + 1 if c < width - 1 else -1):
+            if j >= 0 and terrain[j] != WALL:
+                nd = d + TRANSITION_COSTS[terrain[j]]
+                if nd < dist[j]:
+                    dist[j] = nd
+                    previous[j] = i
+                    heapq.heappush(queue, (nd, j))
+    return dist, previous
+
+
+def manhattan_distances_to(height : int, width : int, targets : Iterable[Coordinate]) -> List[float]:
+    """ Returns the table of the manhattan distances from each cell to the nearest of the targets (ignoring walls and terrain).
+    Computed in O(height * width) by a two-pass distance transform: the nearest target is either up-and-left
+    or down-and-right of a cell's neighbors, so one sweep forward and one backward suffice.
+    """
+    dist = [INF] * (height * width)
+    for target in targets:
+        dist[target.row * width + target.col] = 0
+    for i in range(height * width):
+        d = dist[i]
+        if i >= width and dist[i - width] + 1 < d:
+            d = dist[i - width] + 1
+        if i % width and dist[i - 1] + 1 < d:
+            d = dist[i - 1] + 1
+        dist[i] = d
+    for i in range(height * width - 1, -1, -1):
+        d = dist[i]
+        if i + width < height * width and dist[i + width] + 1 < d:
+            d = dist[i + width] + 1
+        if (i + 1) % width and dist[i + 1] + 1 < d:
+            d = dist[i + 1] + 1
+        dist[i] = d
+    return dist
+
+
+# Tables computed so far, by kind and id of their grid (kept alongside, so the id can't be reused by another grid).
+# Hashing a grid tuple would cost as much as scanning it, so grids are told apart by identity.
+_GRID_TABLES : Dict[Tuple[str, int], Tuple[Grid, Any]] = {}
+MAX_CACHED_GRIDS = 16
+
+def _get_grid_table(kind : str, grid : Grid, compute : Callable[[Grid], Any]) -> Any:
+    """ Returns compute(grid), computing it only on the first call for that kind and grid object. """
+    entry = _GRID_TABLES.get((kind, id(grid)))
+    if entry is not None and entry[0] is grid:
+        return entry[1]
+    table = compute(grid)
+    if len(_GRID_TABLES) >= MAX_CACHED_GRIDS:
+        _GRID_TABLES.clear()
+    _GRID_TABLES[(kind, id(grid))] = (grid, table)
+    return table
+
+
+def get_dirt_locations(grid : Grid) -> Tuple[Coordinate, ...]:
+    """ Returns the dirty spots of grid, in row-major order. """
+    return _get_grid_table("dirt", grid, lambda grid: 
+        tuple(Coordinate(r, c) for r, row in enumerate(grid) for c, t in enumerate(row) if t in (DIRTY_FLOOR, DIRTY_CARPET)))
+
+
+def get_dirt_distances(grid : Grid) -> List[float]:
+    """ Returns the table of lowest costs from each cell to the nearest dirty spot of grid,
+    computing it on the first call for that grid object.
+    """
+    return _get_grid_table("maze", grid, lambda grid: maze_distances_to(grid, get_dirt_locations(grid)))
+
+
+def get_dirt_manhattan_distances(grid : Grid) -> List[float]:
+    """ Returns the table of manhattan distances from each cell to the nearest dirty spot of grid,
+    computing it on the first call for that grid object.
+    """
+    return _get_grid_table("manhattan", grid, lambda grid: manhattan_distances_to(len(grid), len(grid[0]), get_dirt_locations(grid)))
@@ -5,7 +5,7 @@ from os import getcwd
 from sys import argv
 from roomba_problem import *
 from roomba_heuristics import ROOMBA_HEURISTICS
-from search_algorithms import ALGORITHMS, STRATEGIES
+from search_algorithms import ALL_AGENTS, STRATEGIES
 from search_gui import Search_GUI, Search_GUI_Controller
 
 ### State visualization too big? Change these numbers
@@ -124,6 +124,6 @@ if __name__ == "__main__":
         file_path = filedialog.askopenfilename(title = "Open Roomba File",initialdir = getcwd(), filetypes=[("Roomba", ".roomba"), ("Text", ".txt")])
         initroot.destroy()
     initial_state = RoombaState.readFromFile(file_path)
-    gui = Roomba_GUI(initial_state,algorithm_names=ALGORITHMS.keys(), strategy_names=STRATEGIES.keys(), heuristics=ROOMBA_HEURISTICS)
+    gui = Roomba_GUI(initial_state,algorithm_names=ALL_AGENTS.keys(), strategy_names=STRATEGIES.keys(), heuristics=ROOMBA_HEURISTICS)
     controller = Search_GUI_Controller(gui, initial_state, ROOMBA_HEURISTICS)
     gui.mainloop()
\ No newline at end of file
@@ -1,5 +1,6 @@
 from search_heuristics import *
 from roomba_problem import *
+from roomba_distances import get_dirt_locations, get_dirt_distances, get_dirt_manhattan_distances
 INF = float('inf')
 
 #### Lab 1, Part 2a: Heuristics #################################################
@@ -7,13 +8,12 @@ INF = float('inf')
 def roomba_manhattan_onegoal(state : RoombaState) -> float:
     """A heuristic for RoombaState assuming there is only one goal tile.
     Return the manhattan distance to that dirty tile.
+    The dirty tiles are found once per grid (see roomba_distances.py), not on every call.
     """
-    for r in range(state.get_height()):
-        for c in range(state.get_width()):
-            if state.get_terrain(Coordinate(r,c)) in (DIRTY_CARPET, DIRTY_FLOOR) : 
-                # Return manhattan distance between roomba and goal positions
-                
-                return abs(r - state.position.row) + abs(c - state.position.col)
+    dirt = get_dirt_locations(state.grid)
+    if dirt:
+        # Return manhattan distance between roomba and goal positions
+        return abs(dirt[0].row - state.position.row) + abs(dirt[0].col - state.position.col)
 
     return 0 # in the case of no goal, we will return a meaningless value
 
@@ -21,16 +21,16 @@ def roomba_manhattan_onegoal(state : RoombaState) -> float:
 def roomba_manhattan_multigoal(state : RoombaState) -> float:
     """ A heuristic for RoombaState if there is more than one goal tile. 
     Return the manhattan distance to the closest goal.
+    Looked up in a table computed once per grid (see roomba_distances.py), so it costs O(1) regardless of the maze's size.
     """
-    min_dist = INF
+    return get_dirt_manhattan_distances(state.grid)[state.position_index]
 
-    for r in range(state.get_height()):
-        for c in range(state.get_width()):
-            if state.get_terrain(Coordinate(r,c)) in (DIRTY_CARPET, DIRTY_FLOOR) : 
-                # look for smallest manhattan distance between roomba and goal positions
-                dist = abs(r - state.position.row) + abs(c - state.position.col)
-                min_dist = min(min_dist, dist)
-    return min_dist
+
+def roomba_maze_distance(state : RoombaState) -> float:
+    """ The exact cost from the roomba's position to the nearest dirty tile, around walls and over carpet.
+    Looked up in a table computed once per grid (see roomba_distances.py).
+    """
+    return get_dirt_distances(state.grid)[state.position_index]
 
 
 # This is a named list of heuristics for the Roomba problem.
@@ -39,6 +39,7 @@ ROOMBA_HEURISTICS = {
     "Zero" : zero_heuristic, 
     "Arbitrary": arbitrary_heuristic, 
     "Manhattan Dist. (one goal)" : roomba_manhattan_onegoal,
-    "Manhattan Dist. (closest)" : roomba_manhattan_multigoal
+    "Manhattan Dist. (closest)" : roomba_manhattan_multigoal,
+    "Maze Distance (exact)" : roomba_maze_distance
     }
 
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Optional, Tuple, Dict, Any, Hashable, Sequence, Iterable, NamedTuple, TypeVar
+from typing import Optional, Tuple, Dict, Set, Any, Hashable, Sequence, Iterable, NamedTuple, TypeVar
 
 from search_problem import StateNode, Action
 
@@ -33,7 +33,70 @@ def add(c1 : Coordinate, c2 : Coordinate) -> Coordinate:
 
 """All the directions the roomba position can move, and their names."""
 ALL_ACTIONS : Tuple[Coordinate] = (Coordinate(0,1), Coordinate(1,0), Coordinate(0, -1), Coordinate(-1,0))
+REVERSE_ACTIONS : Dict[Coordinate, Coordinate] = {action : Coordinate(-action.row, -action.col) for action in ALL_ACTIONS}
 ACTION_NAMES : Dict[Coordinate, str] = {Coordinate(0,1): "East", Coordinate(1,0): "South", Coordinate(0, -1): "West", Coordinate(-1,0): "North"}
+
+class CompiledGrid:
+    """
+    Lookup tables for one (immutable) grid, built once and shared by all the states that use that grid.
+    Cells are numbered row by row: cell i is at row i // width, column i % width.
+    """
+    grid : Tuple[Tuple[Terrain,...],...]
+    height : int
+    width : int
+    terrain : Tuple[Terrain,...] # terrain[i] is the terrain of cell i
+    coords : Tuple[Coordinate,...] # coords[i] is the Coordinate of cell i
+    actions : Tuple[Tuple[Coordinate,...],...] # actions[i] are the legal actions from cell i, in ALL_ACTIONS order
+    # neighbors[i] are (action, next cell, step cost) for each legal action from cell i
+    neighbors : Tuple[Tuple[Tuple[Coordinate, int, float],...],...] 
+
+    def __init__(self, grid : Tuple[Tuple[Terrain,...],...]):
+        self.grid = grid
+        self.height = height = len(grid)
+        self.width = width = len(grid[0])
+        self.terrain = tuple(t for row in grid for t in row)
+        self.coords = tuple(Coordinate(r, c) for r in range(height) for c in range(width))
+        neighbors = []
+        for r in range(height):
+            for c in range(width):
+                neighbors.append(tuple((action, (r + action.row) * width + c + action.col, 
+                                        TRANSITION_COSTS[grid[r + action.row][c + action.col]])
+                                    for action in ALL_ACTIONS
+                                    if 0 <= r + action.row < height and 0 <= c + action.col < width 
+                                        and grid[r + action.row][c + action.col] != WALL))
+        self.neighbors = tuple(neighbors)
+        self.actions = tuple(tuple(action for action, _, _ in cell) for cell in self.neighbors)
+
+    @staticmethod
+    def of(grid : Tuple[Tuple[Terrain,...],...]) -> CompiledGrid:
+        """ Returns the CompiledGrid for grid, compiling it on the first call for that grid object. """
+        compiled = _COMPILED_GRIDS.get(id(grid))
+        if compiled is None or compiled.grid is not grid:
+            if len(_COMPILED_GRIDS) >= MAX_COMPILED_GRIDS:
+                _COMPILED_GRIDS.clear()
+            compiled = _COMPILED_GRIDS[id(grid)] = CompiledGrid(grid)
+        return compiled
+
+    def __reduce__(self):
+        """ Pickled as just the grid: unpickling (e.g. in another process) gets that process's CompiledGrid for an equal grid. """
+        return (_unpickle_compiled_grid, (self.grid,))
+
+# CompiledGrids so far, by id of their grid (kept alongside, so the id can't be reused by another grid).
+_COMPILED_GRIDS : Dict[int, CompiledGrid] = {}
+MAX_COMPILED_GRIDS = 16
+
+# CompiledGrids unpickled so far, by grid value, so that all the states unpickled for a maze share one grid object
+# (and so the caches keyed by grid identity, like the heuristics' distance tables, keep working)
+_UNPICKLED_GRIDS : Dict[Tuple[Tuple[Terrain,...],...], CompiledGrid] = {}
+
+def _unpickle_compiled_grid(grid : Tuple[Tuple[Terrain,...],...]) -> CompiledGrid:
+    compiled = _UNPICKLED_GRIDS.get(grid)
+    if compiled is None:
+        if len(_UNPICKLED_GRIDS) >= MAX_COMPILED_GRIDS:
+            _UNPICKLED_GRIDS.clear()
+        compiled = _UNPICKLED_GRIDS[grid] = CompiledGrid.of(grid)
+    return compiled
+
 class RoombaState(StateNode):
     """
     An immutable representation of the state of a Roomba Route environment. 
@@ -44,6 +107,8 @@ class RoombaState(StateNode):
     """ Type Hints allow for the optional type declaration of "instance variables" this way, like Java """
     position : Coordinate
     grid : Tuple[Tuple[Terrain,...],...]
+    maze : CompiledGrid # lookup tables for grid
+    position_index : int # cell number of position in maze
 
     #Override
     @staticmethod
@@ -64,7 +129,8 @@ class RoombaState(StateNode):
                                 parent = None,
                                 last_action = None,
                                 depth = 0,
-                                path_cost = 0)
+                                path_cost = 0,
+                                maze = CompiledGrid.of(grid))
     
     #Override
     def __init__(self, 
@@ -73,34 +139,66 @@ class RoombaState(StateNode):
                 parent : Optional[RoombaState], 
                 last_action: Optional[Coordinate],  #Note that actions are (relative) Coordinates!
                 depth : int, 
-                path_cost : float = 0.0) :
+                path_cost : float = 0.0,
+                maze : Optional[CompiledGrid] = None) :
         """
         Creates a RoombaState, which represents a state of the roomba's environment .
 
         Keyword Arguments (in addition to StateNode arguments):
         position: Coordinate of roomba agent's current row/col.
         grid: 2-d Tuple grid of Terrains, representing the maze.
+        maze: The CompiledGrid of grid, shared by all states; looked up (or compiled) from grid if not given.
         """
         super().__init__(parent = parent, last_action = last_action, depth = depth, path_cost = path_cost)
+        if maze is None or maze.grid is not grid:
+            maze = CompiledGrid.of(grid)
         self.position = position
         self.grid = grid
+        self.maze = maze
+        self.position_index = position.row * maze.width + position.col
+
+    def __getstate__(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """ For pickling: the instance variables and StateNode's slots, but not the grid,
+        as it is the maze's grid (see CompiledGrid.__reduce__). 
+        """
+        state = self.__dict__.copy()
+        del state['grid']
+        return state, {name : getattr(self, name) for name in StateNode.__slots__ if hasattr(self, name)}
 
+    def __setstate__(self, state : Tuple[Dict[str, Any], Dict[str, Any]]):
+        instance_variables, slots = state
+        self.__dict__.update(instance_variables)
+        for name, value in slots.items():
+            setattr(self, name, value)
+        self.grid = self.maze.grid
 
     """ Additional accessor methods """
     
     def get_width(self) -> int:
         """Returns the width (number of cols) of the maze"""
-        return len(self.grid[0])
+        return self.maze.width
 
     def get_height(self) -> int:
         """Returns the height (number of rows) of the maze"""
-        return len(self.grid)
+        return self.maze.height
 
     def is_inbounds(self, coord : Coordinate) -> bool:
-        return (coord.row >= 0) and (coord.col  >= 0) and (coord.row < self.get_height()) and (coord.col < self.get_width())
+        return (coord.row >= 0) and (coord.col  >= 0) and (coord.row < self.maze.height) and (coord.col < self.maze.width)
     
     def get_terrain(self, coord : Coordinate) -> Terrain:
-        return self.grid[coord.row][coord.col]
+        return self.maze.terrain[coord.row * self.maze.width + coord.col]
+
+    def get_reachable_positions(self) -> Set[Coordinate]:
+        """Returns every position the roomba can reach from its current position, by flood fill (ignoring cost)."""
+        neighbors = self.maze.neighbors
+        reached = {self.position_index}
+        stack = [self.position_index]
+        while stack:
+            for _, next_index, _ in neighbors[stack.pop()]:
+                if next_index not in reached:
+                    reached.add(next_index)
+                    stack.append(next_index)
+        return {self.maze.coords[i] for i in reached}
 
 
     """ Overridden methods from StateNode """
@@ -110,12 +208,13 @@ class RoombaState(StateNode):
         """Returns a full feature representation of the state.
         Since the grid is the same for all possible states in this environment
         the position alone is sufficient to distinguish between states.
+        It is given as position_index (an int), which is cheaper to hash and compare than a Coordinate.
 
         If two RoombaState objects represent the same state, get_features() should return the same for both objects.
         However, two RoombaState with identical state features may not represent the same node of the search tree -
         that is, they may have different parents, last actions, path lengths/costs etc...
                 """
-        return (self.position)
+        return self.position_index
 
     # Override
     def __str__(self) -> str:
@@ -133,19 +232,14 @@ class RoombaState(StateNode):
     # Override
     def is_legal_action(self, action : Coordinate) -> bool:
         """Returns whether an action is legal from the current state"""
-        newpos = add(self.position, action)
-        return self.is_inbounds(newpos) and self.get_terrain(newpos) != WALL
+        return action in self.maze.actions[self.position_index]
 
     # Override
     def get_all_actions(self) -> Iterable[Coordinate]:
-        """Return all legal actions from this state. Actions are (relative) Coordinates."""
-        for action in ALL_ACTIONS:
-            if self.is_legal_action(action):
-                yield action
-        ### The above generator definition is equivalent to:
-        # return (a for a in ALL_ACTIONS if self.is_legal_action(a))
-        ### If it is better to get a List for the reusability, methods, or indexing:
-        # return [a for a in ALL_ACTIONS if self.is_legal_action(a)]
+        """Return all legal actions from this state. Actions are (relative) Coordinates.
+        They are precomputed for each cell of the maze (see CompiledGrid).
+        """
+        return self.maze.actions[self.position_index]
 
     # Override
     def describe_last_action(self) -> str:
@@ -161,11 +255,55 @@ class RoombaState(StateNode):
 
         -- action is assumed legal (is_legal_action called before)
         """
-        new_pos = add(self.position, action)
-        step_cost = TRANSITION_COSTS[self.get_terrain(new_pos)]
-        return RoombaState( position = new_pos,
+        maze = self.maze
+        new_index = self.position_index + action.row * maze.width + action.col
+        step_cost = TRANSITION_COSTS[maze.terrain[new_index]]
+        return RoombaState( position = maze.coords[new_index],
                                 grid = self.grid, # The grid doesn't change from state to state
                                 last_action = action,
                                 parent = self,
                                 depth = self.depth + 1,
-                                path_cost = self.path_cost + step_cost)
\ No newline at end of file
+                                path_cost = self.path_cost + step_cost,
+                                maze = maze)
+
+    # Override
+    def check_feasibility(self) -> Optional[str]:
+        """Returns a reason if no dirty spot is reachable from the roomba's position, or None otherwise."""
+        if not any(self.grid[pos.row][pos.col] in (DIRTY_FLOOR, DIRTY_CARPET) for pos in self.get_reachable_positions()):
+            return "No dirty spot can be reached from the roomba's position."
+        return None
+
+    # Override
+    def get_features_bit_length(self) -> int:
+        return max(1, (len(self.maze.terrain) - 1).bit_length())
+
+    # Override
+    def state_from_features(self, features : Hashable) -> RoombaState:
+        return RoombaState(position = self.maze.coords[features], grid = self.grid, 
+                        parent = None, last_action = None, depth = 0, path_cost = 0, maze = self.maze)
+
+    # Override
+    def get_goal_states(self) -> Iterable[RoombaState]:
+        """Returns a state with the roomba at each dirty spot."""
+        for r in range(self.get_height()):
+            for c in range(self.get_width()):
+                if self.grid[r][c] in (DIRTY_FLOOR, DIRTY_CARPET):
+                    yield RoombaState(position = Coordinate(r, c), grid = self.grid, 
+                                    parent = None, last_action = None, depth = 0, path_cost = 0, maze = self.maze)
+
+    # Override
+    def get_previous_states(self) -> Iterable[RoombaState]:
+        """Returns a state for each legal position the roomba could have moved here from.
+        The cost of that move is the cost of moving onto this position's terrain.
+        """
+        maze = self.maze
+        step_cost = TRANSITION_COSTS[maze.terrain[self.position_index]]
+        # Moves are reversible: the roomba could have come from any cell it can move to
+        for action, prev_index, _ in maze.neighbors[self.position_index]:
+            yield RoombaState( position = maze.coords[prev_index],
+                            grid = self.grid,
+                            last_action = REVERSE_ACTIONS[action],
+                            parent = self,
+                            depth = self.depth + 1,
+                            path_cost = self.path_cost + step_cost,
+                            maze = maze)
@@ -2,14 +2,35 @@
 # Name(s): 
 
 from __future__ import annotations
-from typing import List, Collection, Tuple, Callable, Optional, Union, Set, Dict, Type, Iterable
+from typing import List, Collection, Tuple, Callable, Optional, Union, Set, Dict, Type, Iterable, Iterator, Hashable, Any
 import random
-from collections import deque
 import heapq
+from collections import deque
 from search_problem import StateNode, Action
+from search_frontiers import IndexedPriorityQueue, BucketPriorityQueue
+from search_arena import NodeArena
+from search_profiler import SearchProfile, DEQUEUE, ENQUEUE, HEURISTIC
 
 INF = float('inf')
 
+def no_callback(node : StateNode) -> bool:
+    """ The default gui_callback_fn for searches run without a GUI; never ends the search early.
+    Searches bind their callback with get_callback, which skips it altogether, so nothing is done per node.
+    """
+    return False
+
+def get_callback(gui_callback_fn : Callable[[StateNode],bool]) -> Optional[Callable[[StateNode],bool]]:
+    """ The callback a search should call with each node: None for no_callback (call nothing), else gui_callback_fn.
+    Searches bind it once, and call it per node as: callback is not None and callback(node).
+    """
+    return None if gui_callback_fn is no_callback else gui_callback_fn
+
+def check_feasibility(initial_state : StateNode) -> Optional[str]:
+    """ The feasibility stage to run before searching: returns the reason no goal can be reached from initial_state,
+    if that is provable by a quick problem-specific check (StateNode.check_feasibility), or None otherwise.
+    """
+    return initial_state.get_as_root_node().check_feasibility()
+
 #### Lab 1, Part 1a: Uninformed Search #################################################
 
 class GoalSearchAgent():
@@ -19,6 +40,14 @@ class GoalSearchAgent():
     frontier : Collection[StateNode] # All Collections are "truthy" - they are True if not empty, False if empty
     total_extends : int 
     total_enqueues : int
+    infeasible_reason : Optional[str] = None # set by search_if_feasible
+    profile : Optional[SearchProfile] = None # set by enable_profiling
+    # Set by memory-bounded searches (SMA*): whether some path was cut off for lack of memory,
+    # so that returning None doesn't prove there is no solution.
+    memory_exhausted : bool = False
+    # Whether graph search reopens a state reached again by a cheaper path. Only worth it for the strategies that
+    # dequeue in order of path cost (or estimated total cost): UCS and A*. The others close a state once it is enqueued.
+    reopens_states : bool = False
 
     """ __init__, enqueue, and dequeue be overridden by STRATEGY partial subclasses (i.e. RandomSearch, DFS, BFS, UCS, Greedy, and AStar)"""
 
@@ -30,8 +59,10 @@ class GoalSearchAgent():
         self.total_extends = 0
         self.total_enqueues = 0
 
-    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF):
-        """ Add the state to the frontier, unless some property (e.g. depth/path cost) exceeds the cutoff """
+    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF) -> bool:
+        """ Add the state to the frontier, unless some property (e.g. depth/path cost) exceeds the cutoff.
+        Returns whether the state was added.
+        """
         # Subclasses will override and implement.
         raise NotImplementedError
         
@@ -40,11 +71,18 @@ class GoalSearchAgent():
         # Subclasses will override and implement.
         raise NotImplementedError
 
+    def get_frontier_key(self, state : StateNode) -> Hashable:
+        """ The key that the cost-ordered strategies (UCS, Greedy, A*) file state under in their frontier,
+        which holds at most one StateNode per key: by default the state's features, so the frontier keeps
+        only the cheapest path found to each state. Overridden by TreeSearchAlgorithm.
+        """
+        return state.get_state_features()
+
     """ search to be implemented by ALGORITHM partial subclasses (i.e. TreeSearch, GraphSearch, AnytimeSearch)"""
 
     def search(self, 
             initial_state : StateNode, 
-            gui_callback_fn : Callable[[StateNode],bool] = lambda : False,
+            gui_callback_fn : Callable[[StateNode],bool] = no_callback,
             cutoff : Union[int, float] = INF 
             ) -> Optional[StateNode]:
         """ To be overridden by algorithm subclasses (TreeSearchAgent, GraphSearchAgent, AnytimeSearchAlgorithm)
@@ -52,6 +90,42 @@ class GoalSearchAgent():
         """
         raise NotImplementedError
 
+    def search_if_feasible(self, 
+            initial_state : StateNode, 
+            gui_callback_fn : Callable[[StateNode],bool] = no_callback,
+            cutoff : Union[int, float] = INF 
+            ) -> Optional[StateNode]:
+        """ Like search, but first runs the feasibility check (see check_feasibility). If the problem is provably
+        infeasible, returns None right away, leaving the reason in self.infeasible_reason.
+        """
+        self.infeasible_reason = check_feasibility(initial_state)
+        if self.infeasible_reason is not None:
+            return None
+        return self.search(initial_state, gui_callback_fn, cutoff)
+
+    def enable_profiling(self) -> SearchProfile:
+        """ Time the phases of this agent's searches from now on, accumulating in self.profile (see search_profiler.py).
+        Wraps this agent's search, enqueue and dequeue (and heuristic, if informed); while a search runs, the initial state's
+        class has its goal test, action generation and get_next_state timed too - process-wide, but only calls on the
+        search's own thread are counted. Searches of agents without it enabled are not slowed down at all
+        (except for a thread-local lookup per state method call, while a profiled search of the same class runs).
+        """
+        if self.profile is None:
+            profile = self.profile = SearchProfile()
+            self.enqueue = profile.timed(ENQUEUE, self.enqueue)
+            self.dequeue = profile.timed(DEQUEUE, self.dequeue)
+            search = self.search
+
+            def profiled_search(initial_state : StateNode, *args, **kwargs) -> Optional[StateNode]:
+                with profile.profiling(type(initial_state)):
+                    return search(initial_state, *args, **kwargs)
+            self.search = profiled_search
+        return self.profile
+
+    def new_filter(self) -> Dict[Hashable, Any]:
+        """ An empty filter (dict from state features) for a graph search; its lookups are timed when profiling. """
+        return {} if self.profile is None else self.profile.timed_filter()
+
 
 class RandomSearch(GoalSearchAgent):
     """ Partial class representing the Random Search strategy.
@@ -68,10 +142,12 @@ class RandomSearch(GoalSearchAgent):
         self.frontier = []
 
         
-    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF):
+    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF) -> bool:
         """ Add the state to the frontier, unless depth exceeds the cutoff """
         if state.depth < cutoff:
             self.frontier.append(state)
+            return True
+        return False
 
         
     def dequeue(self) -> StateNode:
@@ -87,12 +163,20 @@ class TreeSearchAlgorithm(GoalSearchAgent):
 
     Needs to be mixed in with a "strategy" subclass of GoalSearchAgent that
     implements the other methods (i.e. RandomSearch, DFS, BFS, UCS, etc.)
+
+    Tree search does no duplicate detection at all - not even in the frontier: each StateNode is filed under
+    its own key (see get_frontier_key), so the same state may be queued many times, by different paths.
     """
+    def get_frontier_key(self, state : StateNode) -> Hashable:
+        # A StateNode is held by the frontier while it is queued, so its id is unique among the queued ones
+        return id(state)
+
     def search(self, 
         initial_state : StateNode, 
-        gui_callback_fn : Callable[[StateNode],bool] = lambda : False,
+        gui_callback_fn : Callable[[StateNode],bool] = no_callback,
         cutoff : Union[int, float] = INF 
         ) -> Optional[StateNode]:
+        callback = get_callback(gui_callback_fn)
 
         self.enqueue(initial_state, cutoff)
 
@@ -106,7 +190,7 @@ class TreeSearchAlgorithm(GoalSearchAgent):
             if(dQed.is_goal_state()):   # STEP 2
                 return dQed
             
-            if(gui_callback_fn(dQed)): # STEP 3
+            if callback is not None and callback(dQed): # STEP 3
                 return None
 
             iterations = 0              # STEP 4
@@ -116,8 +200,7 @@ class TreeSearchAlgorithm(GoalSearchAgent):
                 
                 if state == dQed.parent:      # no backtracking
                     continue;
-                else:  
-                    self.enqueue(state, cutoff)
+                elif self.enqueue(state, cutoff):
                     self.total_enqueues += 1
                 
                 if (iterations >= cutoff):     # if we pass the cutoff
@@ -171,11 +254,12 @@ class DepthFirstSearch(GoalSearchAgent):
         self.frontier = []  
 
         
-    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF):
+    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF) -> bool:
+        """ Add the state to the frontier, unless depth exceeds the cutoff """
         if(state.depth < cutoff):
             self.frontier.append(state)
-        """ Add the state to the frontier, unless depth exceeds the cutoff """
-        # TODO 
+            return True
+        return False
 
 
         
@@ -202,10 +286,12 @@ class BreadthFirstSearch(GoalSearchAgent):
         self.frontier = deque([])
 
 
-    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF):
+    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF) -> bool:
         """ Add the state to the frontier, unless depth exceeds the cutoff """
         if(state.depth < cutoff):
             self.frontier.append(state)
+            return True
+        return False
 
         
     def dequeue(self) -> StateNode:
@@ -220,34 +306,34 @@ class UniformCostSearch(GoalSearchAgent):
     that implements a search algorithm (i.e. TreeSearchAgent or GraphSearchAgent)
 
     UCS is implemented with a priority queue, which is typically a heap data structure. 
-    The heapq library allows you to use a list as a efficient heap.
-    (heapq.heappush and heapq.heappop are the main methods).
-    Since states aren't ordered, the elements of the list-heap should be 
-    tuples of (priority_value, statenode). heapq orders elements by the first element.
-
-    Check out the documentation of heapq: https://docs.python.org/3/library/heapq.html
+    The frontier is an IndexedPriorityQueue (see search_frontiers.py), a heap that files each StateNode
+    under a key (get_frontier_key) - its state features, except in tree search. So a state is queued at most once;
+    enqueueing it again by a cheaper path lowers its priority in place (decrease-key) instead of piling up a duplicate.
+    Ties are broken by insertion order - FIFO, or LIFO if lifo_ties is True.
     """
-    frontier : List[Tuple[float, StateNode]]
+    frontier : Union[IndexedPriorityQueue, BucketPriorityQueue]
+    frontier_type : Type = IndexedPriorityQueue
+    lifo_ties : bool = False
+    reopens_states = True
     
     def __init__(self,*args, **kwargs):
         """ Initialize self.total_extends and self.total_enqueues (done in super().__init__())
         Create an empty frontier queue.
         """
         super().__init__(*args, **kwargs)
-        self.frontier = []    # help ;-;
-
+        self.frontier = self.frontier_type(lifo = self.lifo_ties)
 
         
-    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF):
+    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF) -> bool:
         """ Add the state to the frontier, unless path COST exceeds the cutoff """
         if(state.path_cost < cutoff):
-            heapq.heappush(self.frontier, (state.path_cost, state))       # is this valid
-
+            return self.frontier.push(self.get_frontier_key(state), (state.path_cost,), state)
+        return False
 
         
     def dequeue(self) -> StateNode:
         """  Choose, remove, and return the state with LOWEST PATH COST from the frontier."""
-        return heapq.heappop(self.frontier)[1]
+        return self.frontier.pop()
 
 
 
@@ -265,57 +351,107 @@ class GraphSearchAlgorithm(GoalSearchAgent):
     """
     def search(self, 
             initial_state : StateNode, 
-            gui_callback_fn : Callable[[StateNode],bool] = lambda : False,
+            gui_callback_fn : Callable[[StateNode],bool] = no_callback,
             cutoff : Union[int, float] = INF 
             ) -> Optional[StateNode]:
+        """ Perform a search from the initial_state, which constitutes the initial frontier.
+        
+        Graph search is similar to tree search, but it manages a filter 
+        to avoid re-extending previously extended states again.
 
-        enqueued = []
-            
-        self.enqueue(initial_state, cutoff)
+        The filter is a dict from state features to the lowest path cost that state has been enqueued with (its best-known g).
+        A neighbor is only enqueued if its state is new - or, if the strategy reopens_states (UCS and A*), if this path
+        to it is cheaper than any before, in which case the state is "reopened", even if it was already extended.
+        This keeps UCS and A* optimal (even with an inconsistent heuristic), without making DFS, BFS, Random or Greedy
+        re-extend states over and over. A dequeued StateNode whose state has since been reached more cheaply is stale, and is skipped.
+        """
+        callback = get_callback(gui_callback_fn)
+        reopen = self.reopens_states
+        best_g : Dict[Hashable, float] = self.new_filter() # Create an empty filter
 
-        if len(self.frontier) == 0:
-            return None
+        if self.enqueue(initial_state, cutoff):
+            best_g[initial_state.get_state_features()] = initial_state.path_cost
 
-        
-        while (len(self.frontier) > 0):
+        while self.frontier:
             dQed = self.dequeue()
+            if dQed.path_cost > best_g[dQed.get_state_features()]:
+                continue
 
-            if(dQed.is_goal_state()): 
+            if dQed.is_goal_state():
                 return dQed
             
-            if(gui_callback_fn(dQed)): 
+            if callback is not None and callback(dQed):
                 return None
 
-            iterations = 0              
             for action in dQed.get_all_actions():
                 state = dQed.get_next_state(action)
-
-                
-                if (state == dQed.parent) or (state in enqueued):   
-                    continue;
-                else:  
-                    self.enqueue(state, cutoff)
-                    enqueued.append(state)
+                features = state.get_state_features()
+                g = best_g.get(features)
+                if g is not None and (g <= state.path_cost or not reopen):
+                    continue
+                if self.enqueue(state, cutoff):
+                    best_g[features] = state.path_cost
                     self.total_enqueues += 1
-                
-                if (iterations >= cutoff):   
-                    break;
 
-                iterations += 1
+            self.total_extends += 1
 
-            if iterations > 0:
-                self.total_extends += 1
-        """ Perform a search from the initial_state, which constitutes the initial frontier.
-        
-        Graph search is similar to tree search, but it manages an "extended filter" 
-        to avoid re-extending previously extended states again.
+        return None
 
-        Create a set of extended states. Before extending any state, check if the state has already been extended.
-        If so, skip it. Otherwise, extend and add to the set. 
-        """
-        ext_filter : Set[StateNode] = set() # Create an empty extended state filter
 
-        #TODO implement! (You may start by copying your TreeSearch's code)
+class ArenaGraphSearchAlgorithm(GoalSearchAgent):
+    """
+    Mixin class for graph search that keeps the search tree in a NodeArena (see search_arena.py) instead of
+    in StateNode parent links, to save memory on big searches.
+
+    Queued StateNodes are detached from their parents (parent is None), so each one is freed as soon as it is
+    dequeued and extended; the tree survives only as a few numbers per node in the arena.
+    The filter maps state features to the arena index of the cheapest node reached for that state.
+    The returned solution is rebuilt from the arena as a full chain of StateNodes, and so is each dequeued node
+    passed to gui_callback_fn - but only if there is a callback (not no_callback), since that costs O(depth) per node.
+
+    Otherwise, behaves exactly like GraphSearchAlgorithm.
+    """
+    arena : Optional[NodeArena] = None
+
+    def search(self,
+            initial_state : StateNode,
+            gui_callback_fn : Callable[[StateNode],bool] = no_callback,
+            cutoff : Union[int, float] = INF
+            ) -> Optional[StateNode]:
+        callback = get_callback(gui_callback_fn)
+        reopen = self.reopens_states
+        arena = self.arena = NodeArena(initial_state)
+        path_costs = arena.path_costs
+        best_node : Dict[Hashable, int] = self.new_filter() # Create an empty filter
+
+        if self.enqueue(initial_state, cutoff):
+            best_node[initial_state.get_state_features()] = 0
+
+        while self.frontier:
+            dQed = self.dequeue()
+            index = best_node[dQed.get_state_features()]
+            if dQed.path_cost > path_costs[index]:
+                continue
+
+            if dQed.is_goal_state():
+                return arena.materialize(index)
+
+            if callback is not None and callback(arena.materialize(index)):
+                return None
+
+            for action in dQed.get_all_actions():
+                state = dQed.get_next_state(action)
+                features = state.get_state_features()
+                old = best_node.get(features)
+                if old is not None and (path_costs[old] <= state.path_cost or not reopen):
+                    continue
+                state.parent = None
+                if self.enqueue(state, cutoff):
+                    best_node[features] = arena.add(index, state)
+                    self.total_enqueues += 1
+
+            self.total_extends += 1
+
         return None
 
 
@@ -338,6 +474,11 @@ class InformedSearchAgent(GoalSearchAgent):
         """
         super().__init__(heuristic = heuristic, *args, **kwargs) # pass any unused parameters to any superclasses
         self.heuristic = heuristic
+
+    def enable_profiling(self) -> SearchProfile:
+        if self.profile is None:
+            self.heuristic = super().enable_profiling().timed(HEURISTIC, self.heuristic)
+        return self.profile
     
 
 class GreedyBestSearch(InformedSearchAgent):
@@ -345,9 +486,10 @@ class GreedyBestSearch(InformedSearchAgent):
     To be subclassed (multiple inheritance) with a mixin that
     that implements a search algorithm (i.e. TreeSearchAgent or GraphSearchAgent)
 
-    Greedy Best is implemented with a priority queue. 
+    Greedy Best is implemented with a priority queue, prioritized by (heuristic, path cost).
     """
-    frontier : List[Tuple[float, StateNode]]
+    frontier : IndexedPriorityQueue
+    lifo_ties : bool = False
 
     def __init__(self, heuristic : Callable[[StateNode],float]):
         """ Initialize self.total_extends and self.total_enqueues(done in super().__init__())
@@ -356,16 +498,17 @@ class GreedyBestSearch(InformedSearchAgent):
         of the remaining cost to goal. 
         """
         super().__init__(heuristic)
-        self.frontier = []    # help ;-;
+        self.frontier = IndexedPriorityQueue(lifo = self.lifo_ties)
         
-    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF):
+    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF) -> bool:
         """ Add the state to the frontier, unless path COST exceeds the cutoff """
         if(state.path_cost < cutoff):
-            heapq.heappush(self.frontier, (self.heuristic(state), state))     # is this valid
+            return self.frontier.push(self.get_frontier_key(state), (self.heuristic(state), state.path_cost), state)
+        return False
         
-    def dequeue(self) -> Tuple[float, StateNode]:
+    def dequeue(self) -> StateNode:
         """  Choose and remove the state with LOWEST ESTIMATED REMAINING COST TO GOAL from the frontier."""
-        return heapq.heappop(self.frontier)[1]
+        return self.frontier.pop()
 
 
 
@@ -375,9 +518,13 @@ class AStarSearch(InformedSearchAgent):
     To be subclassed (multiple inheritance) with a mixin that
     that implements a search algorithm (i.e. TreeSearchAgent or GraphSearchAgent)
 
-    A* is implemented with a priority queue. 
+    A* is implemented with a priority queue, prioritized by (estimated total cost, heuristic) - 
+    among equally promising states, the one estimated to be closer to the goal goes first.
     """
-    frontier : List[Tuple[float, StateNode]]
+    frontier : Union[IndexedPriorityQueue, BucketPriorityQueue]
+    frontier_type : Type = IndexedPriorityQueue
+    lifo_ties : bool = False
+    reopens_states = True
 
     def __init__(self, heuristic : Callable[[StateNode],float], *args, **kwargs):
         """ Initialize self.total_extends and self.total_enqueues (done in super().__init__())
@@ -386,21 +533,39 @@ class AStarSearch(InformedSearchAgent):
         of remaining path cost. 
         """
         super().__init__(heuristic, *args, **kwargs)
-        self.frontier = []    # help ;-;
-        # TODO initiate frontier data structure
+        self.frontier = self.frontier_type(lifo = self.lifo_ties)
 
         
-    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF):
+    def enqueue(self, state: StateNode, cutoff: Union[int, float] = INF) -> bool:
         """ Add the state to the frontier, unless path COST exceeds the cutoff """
         if(state.path_cost < cutoff):
-            heapq.heappush(self.frontier, (self.heuristic(state) + state.path_cost, state))     # is this valid
-       
-
+            h = self.heuristic(state)
+            return self.frontier.push(self.get_frontier_key(state), (state.path_cost + h, h), state)
+        return False
 
         
     def dequeue(self) -> StateNode:
         """  Choose, remove, and return the state with LOWEST ESTIMATED TOTAL PATH COST from the frontier."""
-        return heapq.heappop(self.frontier)[1]
+        return self.frontier.pop()
+
+
+class UniformCostBucketSearch(UniformCostSearch):
+    """ Uniform Cost Search with a bucket queue frontier (see search_frontiers.py), for 
+    problems whose step costs are small integers - like the roomba mazes and slide puzzles.
+    Enqueue and dequeue are amortized O(1) instead of O(log n). 
+    If a non-integer path cost is ever enqueued, the frontier falls back to a heap by itself.
+    """
+    frontier_type = BucketPriorityQueue
+
+
+class AStarBucketSearch(AStarSearch):
+    """ A* with a bucket queue frontier (see search_frontiers.py), for problems whose 
+    step costs and heuristic values are small integers. 
+    Within the same estimated total cost, states are dequeued in insertion order (LIFO, which favors deeper states).
+    If a non-integer priority is ever enqueued (e.g. from a fractional heuristic), the frontier falls back to a heap by itself.
+    """
+    frontier_type = BucketPriorityQueue
+    lifo_ties = True
 
 
 """ Informed search algorithms can be reconfigured to provide a "closest" answer
@@ -426,63 +591,604 @@ class AnytimeSearchAlgorithm(InformedSearchAgent):
 
     def search(self, 
             initial_state : StateNode, 
-            gui_callback_fn : Callable[[StateNode],bool] = lambda : False,
+            gui_callback_fn : Callable[[StateNode],bool] = no_callback,
             cutoff : Union[int, float] = INF 
             ) -> Optional[StateNode]:
-            
-        enqueued = []
+        """ Perform an "Anytime" search from the initial_state
+
+        This is the same as a graph search, but even if the search fails to find a solution, 
+        it should always return the lowest-cost StateNode path  to the state closest* to the solution found so far.
+        *Closest according to the agent's heuristic.
+        """
+        callback = get_callback(gui_callback_fn)
+        reopen = self.reopens_states
+        best_g : Dict[Hashable, float] = self.new_filter()
         best = initial_state
-            
-        self.enqueue(initial_state, cutoff)
+        best_h = self.heuristic(initial_state)
 
-        if len(self.frontier) == 0:
-            return best
+        if self.enqueue(initial_state, cutoff):
+            best_g[initial_state.get_state_features()] = initial_state.path_cost
 
-        
-        while (len(self.frontier) > 0):
+        while self.frontier:
             dQed = self.dequeue()
+            if dQed.path_cost > best_g[dQed.get_state_features()]:
+                continue
 
-            if(dQed.is_goal_state()): 
+            if dQed.is_goal_state():
                 return dQed
             
-            if(gui_callback_fn(dQed)): 
+            if callback is not None and callback(dQed):
                 return best
 
-            iterations = 0              
             for action in dQed.get_all_actions():
                 state = dQed.get_next_state(action)
+                features = state.get_state_features()
+                g = best_g.get(features)
+                if g is not None and (g <= state.path_cost or not reopen):
+                    continue
+                if self.enqueue(state, cutoff):
+                    best_g[features] = state.path_cost
+                    self.total_enqueues += 1
 
-                if (state == dQed.parent) or (state in enqueued):   
-                    continue;
+                    h = self.heuristic(state)
+                    if h < best_h or (h == best_h and state.path_cost < best.path_cost):
+                        best, best_h = state, h
 
-                else:  
-                    self.enqueue(state, cutoff)
-                    enqueued.append(state)
-                    self.total_enqueues += 1
+            self.total_extends += 1
 
-                    if self.heuristic(state) == self.heuristic(best):
-                      if state.path_cost < best.path_cost:
-                        best=state
-                    elif self.heuristic(state) < self.heuristic(best):
-                        best=state
-                    
-                if (iterations >= cutoff):   
-                    break
+        return best
 
-                iterations += 1
 
-            if iterations > 0:
+
+#### Memory-bounded Search (Extension B) #################################################
+
+""" A* must keep its whole frontier (and filter) in memory, which grows exponentially with the solution depth.
+The agents below trade time for memory: they re-generate states instead of storing them.
+Each implements search() by itself, so they are not mixed with the STRATEGIES; see ALL_AGENTS below.
+"""
+
+class IterativeDeepeningAStarSearch(InformedSearchAgent):
+    """
+    Iterative Deepening A* (IDA*).
+
+    Performs a series of depth-first searches, each pruning every state whose estimated total
+    cost (path cost + heuristic) exceeds a bound. The first bound is the initial state's estimate; 
+    each next bound is the lowest estimate that was pruned in the previous iteration.
+    With an admissible heuristic, the first goal found is optimal.
+
+    Memory is linear in the solution depth: the frontier is just the stack of states along the current path,
+    each with the iterator over its remaining actions. The only duplicate detection is "no backtracking" - 
+    a state's parent is never re-entered.
+    """
+    frontier : List[Tuple[StateNode, Iterator[Action], Hashable]] # (state, remaining actions, parent's features)
+    iteration_stats : List[Tuple[float, int, int]] # (bound, extends, enqueues) for each iteration
+
+    def __init__(self, heuristic : Callable[[StateNode],float], *args, **kwargs):
+        super().__init__(heuristic, *args, **kwargs)
+        self.frontier = []
+        self.iteration_stats = []
+
+    def search(self, 
+            initial_state : StateNode, 
+            gui_callback_fn : Callable[[StateNode],bool] = no_callback,
+            cutoff : Union[int, float] = INF 
+            ) -> Optional[StateNode]:
+        """ Perform IDA* from the initial_state. States whose path cost reaches the cutoff are not enqueued.
+        gui_callback_fn is called for every state visited (within the bound), before it is extended.
+        """
+        callback = get_callback(gui_callback_fn)
+        self.iteration_stats = []
+        bound = initial_state.path_cost + self.heuristic(initial_state)
+        while True:
+            extends, enqueues = self.total_extends, self.total_enqueues
+            solution, terminated, next_bound = self._bounded_search(initial_state, bound, callback, cutoff)
+            self.iteration_stats.append((bound, self.total_extends - extends, self.total_enqueues - enqueues))
+            if solution is not None:
+                return solution
+            if terminated or next_bound == INF:
+                return None
+            bound = next_bound
+
+    def _bounded_search(self, 
+            initial_state : StateNode,
+            bound : float,
+            callback : Optional[Callable[[StateNode],bool]],
+            cutoff : Union[int, float]
+            ) -> Tuple[Optional[StateNode], bool, float]:
+        """ One depth-first iteration of IDA*. 
+        Returns the goal state found (or None), whether callback (see get_callback) terminated the search, 
+        and the lowest estimated total cost that exceeded the bound.
+        """
+        next_bound = INF
+        self.frontier = stack = []
+
+        if initial_state.is_goal_state():
+            return initial_state, False, next_bound
+        if callback is not None and callback(initial_state):
+            return None, True, next_bound
+        stack.append((initial_state, iter(initial_state.get_all_actions()), None))
+        self.total_extends += 1
+
+        while stack:
+            state, actions, parent_features = stack[-1]
+            for action in actions:
+                child = state.get_next_state(action)
+                if child.path_cost >= cutoff:
+                    continue
+                features = child.get_state_features()
+                if features == parent_features: # no backtracking
+                    continue
+                self.total_enqueues += 1
+
+                f = child.path_cost + self.heuristic(child)
+                if f > bound:
+                    if f < next_bound:
+                        next_bound = f
+                    continue
+
+                if child.is_goal_state():
+                    return child, False, next_bound
+                if callback is not None and callback(child):
+                    return None, True, next_bound
+
+                stack.append((child, iter(child.get_all_actions()), state.get_state_features()))
                 self.total_extends += 1
-            
-        """ Perform an "Anytime" search from the initial_state
+                break
+            else: # all actions tried
+                stack.pop()
 
-        This is the same as a graph search, but even if the search fails to find a solution, 
-        it should always return the lowest-cost StateNode path  to the state closest* to the solution found so far.
-        *Closest according to the agent's heuristic.
+        return None, False, next_bound
+
+
+class RecursiveBestFirstSearch(InformedSearchAgent):
+    """
+    Recursive Best-First Search (RBFS).
+
+    Like A*, always goes on to the successor with the lowest estimated total cost (f = path cost + heuristic),
+    but only keeps the successors of the states along the current path in memory (linear in depth). 
+    Each level remembers the f of the best alternative path elsewhere; when the current best successor's 
+    f exceeds it, the search unwinds back to that alternative, first "backing up" the lowest f 
+    found below into the abandoned successor. So when the search returns to that subtree later, 
+    it can tell how promising it is without re-exploring it - unlike IDA*, which only keeps a single bound.
+
+    The recursion is implemented with an explicit stack of frames, so deep searches don't hit Python's recursion limit.
+    With an admissible heuristic, the first goal found is optimal.
+    """
+    frontier : List[Tuple[StateNode, List[List], float]] # frames of (state, [f, successor] entries, f limit)
+
+    def __init__(self, heuristic : Callable[[StateNode],float], *args, **kwargs):
+        super().__init__(heuristic, *args, **kwargs)
+        self.frontier = []
+
+    def search(self, 
+            initial_state : StateNode, 
+            gui_callback_fn : Callable[[StateNode],bool] = no_callback,
+            cutoff : Union[int, float] = INF 
+            ) -> Optional[StateNode]:
+        """ Perform RBFS from the initial_state. States whose path cost reaches the cutoff are not enqueued.
+        gui_callback_fn is called for every state the search descends into, before it is extended.
         """
-        #TODO implement! (You may start by copying your GraphSearch's code)
-        return best
+        callback = get_callback(gui_callback_fn)
+        if initial_state.is_goal_state():
+            return initial_state
+        if callback is not None and callback(initial_state):
+            return None
+
+        f = initial_state.path_cost + self.heuristic(initial_state)
+        self.frontier = frames = [self._extend(initial_state, f, INF, cutoff)]
+        backed_up_f = None # The f returned by the last frame popped (the "recursive call" that failed)
+
+        while frames:
+            state, successors, f_limit = frames[-1]
+            if backed_up_f is not None:
+                successors[0][0] = backed_up_f # successors[0] was the one just explored
+                backed_up_f = None
+
+            if not successors:
+                frames.pop()
+                backed_up_f = INF
+                continue
+            successors.sort(key = lambda entry : entry[0])
+            best_f, best = successors[0]
+            if best_f > f_limit or best_f == INF: # INF means every successor's subtree is exhausted
+                frames.pop()
+                backed_up_f = best_f
+                continue
+            alternative_f = successors[1][0] if len(successors) > 1 else INF
+
+            if best.is_goal_state():
+                return best
+            if callback is not None and callback(best):
+                return None
+            frames.append(self._extend(best, best_f, min(f_limit, alternative_f), cutoff))
+
+        return None
 
+    def _extend(self, 
+            state : StateNode, 
+            f : float, 
+            f_limit : float, 
+            cutoff : Union[int, float]
+            ) -> Tuple[StateNode, List[List], float]:
+        """ Returns a new frame for state: its successors (except its parent, and any whose path cost 
+        reaches the cutoff), each with an f no lower than state's own f (which may have been backed up).
+        """
+        parent_features = state.parent.get_state_features() if state.parent is not None else None
+        successors = []
+        for action in state.get_all_actions():
+            child = state.get_next_state(action)
+            if child.path_cost >= cutoff or child.get_state_features() == parent_features:
+                continue
+            successors.append([max(child.path_cost + self.heuristic(child), f), child])
+            self.total_enqueues += 1
+        self.total_extends += 1
+        return (state, successors, f_limit)
+
+
+class _SMANode:
+    """ A search tree node held in memory by SimplifiedMemoryBoundedAStarSearch. """
+    __slots__ = ('state', 'features', 'f', 'parent', 'children', 'forgotten', 'expanded', 'in_open', 'version')
+    state : StateNode
+    features : Hashable
+    f : float # estimated total cost; once extended, backed up from the children (and forgotten children)
+    parent : Optional[_SMANode]
+    children : Dict[Hashable, _SMANode] # successors currently in memory, by features
+    forgotten : Dict[Hashable, float] # backed-up f of successors that were forgotten, by features
+    expanded : bool
+    in_open : bool
+    version : int # bumped whenever f or in_open changes, invalidating older entries in the open heaps
+
+    def __init__(self, state : StateNode, f : float, parent : Optional[_SMANode]):
+        self.state = state
+        self.features = state.get_state_features()
+        self.f = f
+        self.parent = parent
+        self.children = {}
+        self.forgotten = {}
+        self.expanded = False
+        self.in_open = False
+        self.version = 0
+
+
+class SimplifiedMemoryBoundedAStarSearch(InformedSearchAgent):
+    """
+    Simplified Memory-Bounded A* (SMA*).
+
+    Behaves like A* (always extending the lowest-f state, the deepest one on ties) until the 
+    number of search tree nodes held in memory reaches max_nodes. From then on, each time new
+    nodes are generated, the worst leaves (highest f, shallowest on ties) are forgotten to make room.
+    A forgotten leaf's f is backed up into its parent, which goes back on the frontier so 
+    that subtree can be regenerated later, if it ever looks like the best option again.
+
+    Each extended node's f is backed up from its children (including forgotten ones), so it
+    always reflects the best path known below it. A state that cannot be reached within the
+    budget (its depth would need more than max_nodes nodes in memory) gets an f of INF.
+
+    With an admissible heuristic, the goal found is optimal if the optimal path fits in memory;
+    otherwise the best reachable one is returned. If no goal is reachable within the budget, search returns None
+    and sets memory_exhausted if that is for lack of memory (some path was cut off at the depth limit) -
+    the problem may still be solvable with a larger max_nodes.
+    total_forgotten and total_regenerated count leaves forgotten and re-generated.
+    """
+    DEFAULT_MAX_NODES : int = 100000
+
+    max_nodes : int
+    total_forgotten : int
+    total_regenerated : int
+    frontier : List[Tuple[float, int, int, int, _SMANode]] # min-heap of (f, -depth, -count, version, node) of open nodes
+
+    def __init__(self, heuristic : Callable[[StateNode],float], max_nodes : int = DEFAULT_MAX_NODES, *args, **kwargs):
+        super().__init__(heuristic, *args, **kwargs)
+        self.max_nodes = max(max_nodes, 2)
+        self.total_forgotten = 0
+        self.total_regenerated = 0
+        self.frontier = []
+        self._worst = [] # max-heap of (-f, depth, count, version, node) of open nodes
+        self._count = 0
+        self._nodes_in_memory = 0
+
+    def search(self, 
+            initial_state : StateNode, 
+            gui_callback_fn : Callable[[StateNode],bool] = no_callback,
+            cutoff : Union[int, float] = INF 
+            ) -> Optional[StateNode]:
+        """ Perform SMA* from the initial_state. States whose path cost reaches the cutoff are not enqueued.
+        gui_callback_fn is called for every state dequeued, before it is extended.
+        """
+        callback = get_callback(gui_callback_fn)
+        self.memory_exhausted = False
+        root = _SMANode(initial_state, initial_state.path_cost + self.heuristic(initial_state), None)
+        self._nodes_in_memory = 1
+        self._open(root)
+
+        while self.frontier:
+            best = self._pop_best()
+            if best is None or best.f == INF:
+                return None
+            if best.state.is_goal_state():
+                return best.state
+            if callback is not None and callback(best.state):
+                return None
+
+            self._extend(best, cutoff)
+            self._backup(best)
+            while self._nodes_in_memory > self.max_nodes:
+                if not self._forget_worst_leaf():
+                    break
+        return None
+
+    def _extend(self, node : _SMANode, cutoff : Union[int, float]):
+        """ Generate every successor of node that is not in memory (regenerating forgotten ones), and close node. """
+        state = node.state
+        parent_features = node.parent.features if node.parent is not None else None
+        for action in state.get_all_actions():
+            child_state = state.get_next_state(action)
+            if child_state.path_cost >= cutoff:
+                continue
+            child = _SMANode(child_state, 0, node)
+            if child.features in node.children or child.features == parent_features:
+                continue
+
+            f = max(child_state.path_cost + self.heuristic(child_state), node.f) # pathmax
+            forgotten_f = node.forgotten.pop(child.features, None)
+            if forgotten_f is not None:
+                f = max(f, forgotten_f)
+                self.total_regenerated += 1
+            if child_state.depth >= self.max_nodes - 1 and not child_state.is_goal_state():
+                f = INF # Can't go deeper without running out of memory
+                self.memory_exhausted = True
+            child.f = f
+
+            node.children[child.features] = child
+            self._nodes_in_memory += 1
+            self._open(child)
+            self.total_enqueues += 1
+
+        node.expanded = True
+        node.forgotten.clear() # anything still forgotten can't be generated anymore (e.g. beyond the cutoff)
+        if node.children:
+            self._close(node)
+        # else a dead end; it stays on the frontier as a leaf (its f backed up to INF) so it can be forgotten
+        self.total_extends += 1
+
+    def _backup(self, node : _SMANode):
+        """ Recompute node's f from its successors, and propagate any change up to its ancestors. """
+        while node is not None and node.expanded:
+            f = min(min((c.f for c in node.children.values()), default = INF), 
+                    min(node.forgotten.values(), default = INF))
+            if f == node.f:
+                return
+            node.f = f
+            if node.in_open:
+                self._open(node)
+            node = node.parent
+
+    def _forget_worst_leaf(self) -> bool:
+        """ Forget the open leaf with the highest f (shallowest on ties), other than the root, 
+        backing up its f into its parent and putting the parent back on the frontier.
+        Returns False if there is no such leaf.
+        """
+        worst = self._worst
+        while worst:
+            neg_f, depth, count, version, node = heapq.heappop(worst)
+            if node.in_open and version == node.version and not node.children and node.parent is not None:
+                self._close(node)
+                parent = node.parent
+                del parent.children[node.features]
+                parent.forgotten[node.features] = node.f
+                self._nodes_in_memory -= 1
+                self.total_forgotten += 1
+                self._open(parent)
+                return True
+        return False
+
+    def _open(self, node : _SMANode):
+        """ Put node on the frontier, or refresh its entries if its f changed. """
+        node.in_open = True
+        node.version += 1
+        self._count += 1
+        depth = node.state.depth
+        heapq.heappush(self.frontier, (node.f, -depth, -self._count, node.version, node))
+        heapq.heappush(self._worst, (-node.f, depth, self._count, node.version, node))
+        if len(self.frontier) + len(self._worst) > 8 * self._nodes_in_memory + 128:
+            self._compact()
+
+    def _close(self, node : _SMANode):
+        node.in_open = False
+        node.version += 1
+
+    def _pop_best(self) -> Optional[_SMANode]:
+        """ Remove and return the open node with the lowest f (deepest on ties) """
+        while self.frontier:
+            f, neg_depth, neg_count, version, node = heapq.heappop(self.frontier)
+            if node.in_open and version == node.version:
+                return node
+        return None
+
+    def _compact(self):
+        """ Drop outdated entries from both heaps. """
+        self.frontier = [e for e in self.frontier if e[4].in_open and e[3] == e[4].version]
+        heapq.heapify(self.frontier)
+        self._worst = [e for e in self._worst if e[4].in_open and e[3] == e[4].version]
+        heapq.heapify(self._worst)
+
+
+#### Bidirectional Search #################################################
+
+""" For problems whose goal state(s) are known, and whose actions can be reversed 
+(see StateNode.get_goal_states and get_previous_states), searching forward from the initial state 
+and backward from the goal at the same time, until the two searches meet in the middle, can
+extend about square-root as many states as searching in one direction only.
+"""
+
+class BidirectionalSearch(GoalSearchAgent):
+    """
+    Abstract class for bidirectional graph search. 
+
+    Keeps a frontier and filter (dict from state features to the best StateNode reaching that state) for each direction.
+    Whenever a state is reached in one direction that was already reached in the other, the two paths form a
+    solution; the cheapest so far (mu) is kept. The search stops when the frontiers prove that no cheaper
+    solution can remain (subclasses define how), and the solution path is stitched together by replaying 
+    the backward half's actions forward from the meeting state.
+
+    Subclasses define the priority of states in each direction's frontier and the stopping rule.
+    """
+    frontier : IndexedPriorityQueue # forward frontier
+    backward_frontier : IndexedPriorityQueue
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.frontier = IndexedPriorityQueue()
+        self.backward_frontier = IndexedPriorityQueue()
+
+    def get_cost(self, state : StateNode) -> float:
+        """ The cost of the path to state (from the initial state, or from the goal for backward states) that the search minimizes. """
+        return state.path_cost
+
+    def get_priority(self, state : StateNode, forward : bool) -> Tuple:
+        """ The priority of state in the frontier of its direction (lowest first) """
+        raise NotImplementedError
+
+    def should_stop(self, mu : float) -> bool:
+        """ Returns True if no solution cheaper than mu can be found by continuing. Called with both frontiers non-empty."""
+        raise NotImplementedError
+
+    def choose_forward(self) -> bool:
+        """ Returns whether to extend the forward frontier next (vs. the backward frontier). 
+        By default, the one with the lowest priority, or the smaller one on ties.
+        """
+        f, b = self.frontier.peek_priority(), self.backward_frontier.peek_priority()
+        if f != b:
+            return f < b
+        return len(self.frontier) <= len(self.backward_frontier)
+
+    def search(self, 
+            initial_state : StateNode, 
+            gui_callback_fn : Callable[[StateNode],bool] = no_callback,
+            cutoff : Union[int, float] = INF 
+            ) -> Optional[StateNode]:
+        """ Perform bidirectional search between the initial_state and initial_state.get_goal_states().
+        States whose cost reaches the cutoff are not enqueued, in either direction, nor are solutions whose cost reaches it.
+        gui_callback_fn is called for every state dequeued (forward or backward) before it is extended.
+        """
+        callback = get_callback(gui_callback_fn)
+        if initial_state.is_goal_state():
+            return initial_state
+
+        reached_forward : Dict[Hashable, StateNode] = self.new_filter()
+        reached_backward : Dict[Hashable, StateNode] = self.new_filter()
+        self.mu = INF
+        self.meeting = None # (forward StateNode, backward StateNode) for the same state, forming the best solution so far
+
+        self._enqueue(initial_state, True, reached_forward, reached_backward, cutoff)
+        for goal_state in initial_state.get_goal_states():
+            self._enqueue(goal_state, False, reached_backward, reached_forward, cutoff)
+
+        while self.frontier and self.backward_frontier:
+            if self.should_stop(self.mu):
+                break
+            forward = self.choose_forward()
+            frontier, reached, opposite = ((self.frontier, reached_forward, reached_backward) if forward 
+                                            else (self.backward_frontier, reached_backward, reached_forward))
+            dQed = frontier.pop()
+
+            if callback is not None and callback(dQed):
+                return None
+
+            for state in (dQed.get_next_state(action) for action in dQed.get_all_actions()) if forward else dQed.get_previous_states():
+                self._enqueue(state, forward, reached, opposite, cutoff)
+            self.total_extends += 1
+
+        if self.meeting is None:
+            return None
+        return self._stitch(*self.meeting)
+
+    def _enqueue(self, 
+            state : StateNode, 
+            forward : bool, 
+            reached : Dict[Hashable, StateNode], 
+            opposite : Dict[Hashable, StateNode], 
+            cutoff : Union[int, float]):
+        """ Enqueue state in its direction's frontier if it is new or cheaper, and check if it meets the opposite search. """
+        cost = self.get_cost(state)
+        if cost >= cutoff:
+            return
+        features = state.get_state_features()
+        best = reached.get(features)
+        if best is not None and self.get_cost(best) <= cost:
+            return
+        reached[features] = state
+        (self.frontier if forward else self.backward_frontier).push(features, self.get_priority(state, forward), state)
+        self.total_enqueues += 1
+
+        other = opposite.get(features)
+        if other is not None and cost + self.get_cost(other) < min(self.mu, cutoff):
+            self.mu = cost + self.get_cost(other)
+            self.meeting = (state, other) if forward else (other, state)
+
+    def _stitch(self, forward_state : StateNode, backward_state : StateNode) -> StateNode:
+        """ Extend the forward path to the meeting state by replaying the backward path's actions toward the goal. """
+        state = forward_state
+        while backward_state.parent is not None:
+            state = state.get_next_state(backward_state.last_action)
+            backward_state = backward_state.parent
+        return state
+
+
+class BidirectionalBreadthFirstSearch(BidirectionalSearch):
+    """ Bidirectional breadth-first search: finds the path with the fewest actions. 
+    Always extends the smaller frontier. Stops once the shallowest states of the two frontiers
+    together are at least as deep as the best solution.
+    """
+    def get_cost(self, state : StateNode) -> float:
+        return state.depth
+
+    def get_priority(self, state : StateNode, forward : bool) -> Tuple:
+        return (state.depth,)
+
+    def choose_forward(self) -> bool:
+        return len(self.frontier) <= len(self.backward_frontier)
+
+    def should_stop(self, mu : float) -> bool:
+        return self.frontier.peek_priority()[0] + self.backward_frontier.peek_priority()[0] >= mu
+
+
+class BidirectionalUniformCostSearch(BidirectionalSearch):
+    """ Bidirectional uniform cost search: finds the path with lowest cost.
+    Always extends the frontier with the cheapest state. Stops once the cheapest states of the two frontiers
+    together cost at least as much as the best solution.
+    """
+    def get_priority(self, state : StateNode, forward : bool) -> Tuple:
+        return (state.path_cost,)
+
+    def should_stop(self, mu : float) -> bool:
+        return self.frontier.peek_priority()[0] + self.backward_frontier.peek_priority()[0] >= mu
+
+
+class BidirectionalMMSearch(BidirectionalSearch, InformedSearchAgent):
+    """ Bidirectional heuristic search that is guaranteed to "Meet in the Middle" (MM; Holte et al., 2016).
+
+    Each direction's priority is max(f, 2g), where g is the path cost in that direction and f = g + h, 
+    so neither search goes past the middle of the optimal path. 
+    The lower of the two frontiers' lowest priorities is a lower bound on the cost of any solution not found yet,
+    so the search stops once it is at least mu. With admissible heuristics, the solution is optimal.
+
+    The forward search uses the agent's heuristic (estimating cost to the goal). The backward search needs one 
+    estimating the cost from the initial state; backward_heuristic defaults to the zero heuristic, which is always admissible.
+    """
+    backward_heuristic : Callable[[StateNode],float]
+
+    def __init__(self, heuristic : Callable[[StateNode],float], backward_heuristic : Callable[[StateNode],float] = lambda state : 0, *args, **kwargs):
+        super().__init__(heuristic = heuristic, *args, **kwargs)
+        self.backward_heuristic = backward_heuristic
+
+    def get_priority(self, state : StateNode, forward : bool) -> Tuple:
+        g = state.path_cost
+        h = self.heuristic(state) if forward else self.backward_heuristic(state)
+        return (max(g + h, 2 * g), g)
+
+    def should_stop(self, mu : float) -> bool:
+        return min(self.frontier.peek_priority()[0], self.backward_frontier.peek_priority()[0]) >= mu
 
 
 # Collection of all the above. If you write other ones, add them here.
@@ -490,6 +1196,7 @@ class AnytimeSearchAlgorithm(InformedSearchAgent):
 ALGORITHMS : Dict[str, Type[GoalSearchAgent] ] = {
     "tree": TreeSearchAlgorithm, 
     "graph": GraphSearchAlgorithm, 
+    "graph-arena": ArenaGraphSearchAlgorithm,
     "anytime" : AnytimeSearchAlgorithm
 }
 
@@ -500,6 +1207,8 @@ STRATEGIES : Dict[str, Type[GoalSearchAgent] ] = {
     "ucs": UniformCostSearch,
     "greedy": GreedyBestSearch,
     "astar": AStarSearch,
+    "ucs-bucket": UniformCostBucketSearch,
+    "astar-bucket": AStarBucketSearch,
 }
 
 """
@@ -511,6 +1220,18 @@ for alg in ALGORITHMS:
     for strat in STRATEGIES:
         ALL_AGENTS[alg][strat] = type(alg + "-" + strat, (ALGORITHMS[alg], STRATEGIES[strat]), {})
 
+"""
+Agents that implement their own search, instead of mixing an algorithm with a strategy.
+"""
+ALL_AGENTS["iterative-deepening"] = {"astar": IterativeDeepeningAStarSearch}
+ALL_AGENTS["recursive-best-first"] = {"astar": RecursiveBestFirstSearch}
+ALL_AGENTS["memory-bounded"] = {"astar": SimplifiedMemoryBoundedAStarSearch}
+ALL_AGENTS["bidirectional"] = {
+    "bfs": BidirectionalBreadthFirstSearch,
+    "ucs": BidirectionalUniformCostSearch,
+    "astar": BidirectionalMMSearch,
+}
+
 
 ### Completely Optional Extensions ########################################################
 
@@ -524,10 +1245,11 @@ for alg in ALGORITHMS:
  Write a script to open and test different slide puzzle boards.
  """
 
-# from slidepuzzle_problem import SlidePuzzleState
-# def is_solvable(board : SlidePuzzleState):
-#     """is this board solvable? return a boolean"""
-#     raise NotImplementedError
+def is_solvable(board : StateNode) -> bool:
+    """is this board (a SlidePuzzleState) solvable? return a boolean
+    The parity argument itself is in SlidePuzzleState.is_solvable.
+    """
+    return board.is_solvable()
 
 
 """ B) A* is optimal, but its memory usage is still prohibitive for large state spaces.
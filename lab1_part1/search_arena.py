@@ -0,0 +1,69 @@
+from __future__ import annotations
+from typing import List, Dict, Hashable
+from array import array
+
+from search_problem import StateNode, Action
+"""
+A compact store for the search tree, for searches too big to keep every StateNode alive.
+
+Normally every StateNode holds its parent, so the whole explored tree stays in memory as full Python objects
+(and their state payloads) until the search ends. A NodeArena instead records each node as one slot
+in a few parallel typed arrays - its parent's index, a code for its last action and its path cost -
+so once a node's StateNode has been extended it can be dropped, and an extended node costs a few dozen bytes.
+
+StateNodes are only materialized again when needed (e.g. for the returned solution), by replaying the recorded
+actions from the root with get_next_state. The result is an ordinary chain of StateNodes, so get_path() works as usual.
+"""
+
+NO_PARENT = -1 # parent index of the root
+
+
+class NodeArena:
+    """ The nodes of one search tree, numbered 0, 1, 2, ... in the order they are added. Node 0 is the root.
+
+    Distinct actions are interned: each is stored once, in actions, and nodes refer to it by its index (its code).
+    """
+    root : StateNode
+    parents : array # parents[i] is the index of node i's parent (NO_PARENT for the root)
+    action_codes : array # action_codes[i] is the code of node i's last action (-1 for the root)
+    path_costs : array
+    actions : List[Action]
+    _codes : Dict[Hashable, int] # code of each action in actions
+
+    def __init__(self, root : StateNode):
+        self.root = root
+        self.parents = array('i', [NO_PARENT])
+        self.action_codes = array('i', [-1])
+        self.path_costs = array('d', [root.path_cost])
+        self.actions = []
+        self._codes = {}
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def add(self, parent : int, state : StateNode) -> int:
+        """ Record state as a child of node parent (reached by state.last_action), and return its index. """
+        code = self._codes.get(state.last_action)
+        if code is None:
+            code = self._codes[state.last_action] = len(self.actions)
+            self.actions.append(state.last_action)
+        self.parents.append(parent)
+        self.action_codes.append(code)
+        self.path_costs.append(state.path_cost)
+        return len(self.parents) - 1
+
+    def get_actions(self, index : int) -> List[Action]:
+        """ The actions along the path from the root to node index. """
+        codes = []
+        while index != 0:
+            codes.append(self.action_codes[index])
+            index = self.parents[index]
+        codes.reverse()
+        return [self.actions[code] for code in codes]
+
+    def materialize(self, index : int) -> StateNode:
+        """ Rebuild node index as a StateNode, with its full chain of parents back to the root. """
+        state = self.root
+        for action in self.get_actions(index):
+            state = state.get_next_state(action)
+        return state
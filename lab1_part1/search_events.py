@@ -0,0 +1,214 @@
+from __future__ import annotations
+from typing import List, Optional, Callable, Union, Iterator, NamedTuple
+import queue
+import threading
+import time
+
+from search_problem import StateNode
+from search_algorithms import GoalSearchAgent, no_callback
+"""
+A stream of snapshot events from a running search, for the GUI, loggers and benchmarks.
+
+Every agent reports its progress through gui_callback_fn, called synchronously with each dequeued node.
+A SearchEventStream wraps one search, and turns those calls into SearchEvents - a snapshot of the dequeued node,
+the frontier size and the agent's counters - but only for a sample of them: every so many nodes, and/or
+at most once per so many seconds. Consumers either subscribe to the stream (push: each subscriber is called
+with each event, in the search's own thread), or iterate over it (pull: the search runs in a background thread,
+paused while the consumer handles each event, so every snapshot is consistent).
+
+When nobody is listening, the search is run with no_callback, which the agents skip altogether -
+the hot loop does no callback work at all.
+
+For example, to log progress every second:
+    for event in SearchEventStream(agent, initial_state, interval = 1.0):
+        print(event)
+"""
+
+INF = float('inf')
+
+# Kind of a SearchEvent
+DEQUEUED = "dequeued" # a sampled node, about to be extended
+FINISHED = "finished" # the search ended; always the last event
+
+class SearchEvent(NamedTuple):
+    """ A snapshot of a running search. """
+    kind : str
+    node : Optional[StateNode] # the dequeued node if DEQUEUED, the solution (or None) if FINISHED
+    frontier_size : Optional[int] # None if the agent's frontier has no size
+    total_extends : int
+    total_enqueues : int
+    nodes_seen : int # how many times the search has called back so far (sampled or not)
+    elapsed : float # seconds since the search started
+
+    def __str__(self) -> str:
+        return "{:<8} {:>8.3f}s  nodes {:<9} frontier {:<9} extends {:<9} enqueues {:<9} {}".format(
+            self.kind, self.elapsed, self.nodes_seen, "-" if self.frontier_size is None else self.frontier_size,
+            self.total_extends, self.total_enqueues,
+            "" if self.node is None else "depth {}, cost {}".format(self.node.depth, self.node.path_cost))
+
+
+class SearchEventStream:
+    """
+    One search (agent.search from initial_state), as a stream of SearchEvents (see above).
+
+    every -- only every so many nodes is sampled (1: all of them).
+    interval -- if given, at most one node is sampled per so many seconds (the clock is only read on nodes that pass every).
+    check_feasibility -- run agent.search_if_feasible instead of agent.search.
+
+    After the search, solution holds its result. A subscriber (or iterating consumer) can end the search early:
+    a subscriber by returning True, an iterating consumer by leaving the loop (closing the iterator).
+    The stream can only be run once.
+    """
+    agent : GoalSearchAgent
+    initial_state : StateNode
+    cutoff : Union[int, float]
+    every : int
+    interval : Optional[float]
+    check_feasibility : bool
+    subscribers : List[Callable[[SearchEvent], Optional[bool]]]
+    solution : Optional[StateNode]
+    terminated : bool # whether a consumer ended the search early
+
+    def __init__(self,
+            agent : GoalSearchAgent,
+            initial_state : StateNode,
+            cutoff : Union[int, float] = INF,
+            every : int = 1,
+            interval : Optional[float] = None,
+            check_feasibility : bool = False):
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.agent = agent
+        self.initial_state = initial_state
+        self.cutoff = cutoff
+        self.every = every
+        self.interval = interval
+        self.check_feasibility = check_feasibility
+        self.subscribers = []
+        self.solution = None
+        self.terminated = False
+        self._started = None
+        self._nodes_seen = 0
+
+    def subscribe(self, subscriber : Callable[[SearchEvent], Optional[bool]]):
+        """ Call subscriber with each event; if it returns True, the search ends early. """
+        self.subscribers.append(subscriber)
+
+    def snapshot(self, kind : str, node : Optional[StateNode]) -> SearchEvent:
+        try:
+            frontier_size = len(self.agent.frontier)
+        except (AttributeError, TypeError):
+            frontier_size = None
+        return SearchEvent(kind, node, frontier_size, self.agent.total_extends, self.agent.total_enqueues,
+                            self._nodes_seen, time.time() - self._started)
+
+    def _sampled(self, emit : Callable[[SearchEvent], bool]) -> Callable[[StateNode], bool]:
+        """ A gui_callback_fn that passes a snapshot of each sampled node to emit, and returns what it returns. """
+        every, interval = self.every, self.interval
+        next_time = -INF
+
+        def callback(node : StateNode) -> bool:
+            nonlocal next_time
+            self._nodes_seen += 1
+            if self._nodes_seen % every:
+                return False
+            if interval is not None:
+                now = time.time()
+                if now < next_time:
+                    return False
+                next_time = now + interval
+            return emit(self.snapshot(DEQUEUED, node))
+        return callback
+
+    def _search(self, gui_callback_fn : Callable[[StateNode], bool]) -> Optional[StateNode]:
+        self._started = time.time()
+        search = self.agent.search_if_feasible if self.check_feasibility else self.agent.search
+        self.solution = search(self.initial_state, gui_callback_fn, self.cutoff)
+        return self.solution
+
+    def _publish(self, event : SearchEvent) -> bool:
+        terminate = False
+        for subscriber in self.subscribers:
+            if subscriber(event):
+                terminate = True
+        if terminate:
+            self.terminated = True
+        return terminate
+
+    def run(self) -> Optional[StateNode]:
+        """ Run the search in this thread, publishing events to the subscribers; returns the solution.
+        With no subscribers, the search runs with no_callback.
+        """
+        if not self.subscribers:
+            return self._search(no_callback)
+        self._search(self._sampled(self._publish))
+        self._publish(self.snapshot(FINISHED, self.solution))
+        return self.solution
+
+    def __iter__(self) -> Iterator[SearchEvent]:
+        """ Run the search in a background thread, yielding its events (to subscribers too, if any).
+        The search waits while each event is handled; leaving the loop early ends the search.
+        """
+        events : queue.Queue = queue.Queue(maxsize = 1)
+        resume : queue.Queue = queue.Queue(maxsize = 1)
+        failure : List[BaseException] = []
+
+        def emit(event : SearchEvent) -> bool:
+            terminate = self._publish(event)
+            events.put(event)
+            return resume.get() or terminate
+
+        def run():
+            try:
+                self._search(self._sampled(emit))
+            except BaseException as e:
+                failure.append(e)
+            events.put(None)
+
+        thread = threading.Thread(target = run, daemon = True)
+        thread.start()
+        finished = False
+        try:
+            while True:
+                event = events.get()
+                if event is None:
+                    finished = True
+                    break
+                yield event
+                resume.put(False)
+        finally:
+            if not finished: # the consumer left early: stop the search at its sampled node
+                self.terminated = True
+                resume.put(True)
+                while events.get() is not None:
+                    resume.put(True)
+            thread.join()
+        if failure:
+            raise failure[0]
+        event = self.snapshot(FINISHED, self.solution)
+        self._publish(event)
+        yield event
+
+
+if __name__ == "__main__":
+    import argparse
+    from search_portfolio import PROBLEMS, _problem_of
+    parser = argparse.ArgumentParser(description = "Log the progress of one search.")
+    parser.add_argument("filename")
+    parser.add_argument("algorithm")
+    parser.add_argument("strategy")
+    parser.add_argument("heuristic")
+    parser.add_argument("--problem", choices = PROBLEMS.keys(), help = "default: guessed from the file")
+    parser.add_argument("--every", type = int, default = 1, help = "sample every so many nodes")
+    parser.add_argument("--interval", type = float, default = 1.0, help = "seconds between samples")
+    parser.add_argument("--profile", action = "store_true", help = "time the search phases")
+    args = parser.parse_args()
+
+    state_class, heuristics, agents = PROBLEMS[args.problem or _problem_of(args.filename)]
+    agent = agents[args.algorithm][args.strategy](heuristic = heuristics[args.heuristic])
+    if args.profile:
+        agent.enable_profiling()
+    for event in SearchEventStream(agent, state_class.readFromFile(args.filename), every = args.every, interval = args.interval):
+        print(event)
+    if agent.profile is not None:
+        print(agent.profile)
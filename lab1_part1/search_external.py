@@ -0,0 +1,310 @@
+from __future__ import annotations
+from typing import List, Dict, Tuple, Optional, Callable, Union, Iterable, Iterator
+import heapq
+import os
+import shutil
+import tempfile
+
+from search_problem import StateNode
+from search_algorithms import InformedSearchAgent, no_callback, get_callback
+from search_heuristics import zero_heuristic
+"""
+External-memory search: A* and breadth-first search for state spaces that don't fit in memory.
+
+Instead of a frontier and a filter in memory, states are kept on disk in bucket files, one for each (g, h) -
+path cost and heuristic value. Each state is a fixed-width record: its features (an int, see
+StateNode.get_features_bit_length and state_from_features) followed by its parent's features.
+The buckets are extended in order of g + h, then g; extending a bucket appends its children's records to their
+own buckets, unsorted, with no duplicate checks (delayed duplicate detection). Records are buffered per bucket,
+and appended to its file a chunk at a time, so no file is kept open between writes, however many buckets there are.
+
+When a bucket's turn comes, it is sorted in runs that fit in the memory cap, and the runs are merged,
+dropping duplicate states, and any state already in an extended bucket with the same h and a lower g
+(a state's h never changes, so that is where its duplicates would be). The sorted result is streamed back to be
+extended one state at a time, and kept on disk. Only a few records are ever in memory at once, beyond the runs and the write buffers.
+
+The solution is reconstructed by a backward pass: from the goal's record, each parent is found (by binary search)
+in the kept sorted buckets, back to the initial state, and the path is then replayed forward with get_next_state.
+
+As with in-memory A*, the solution is optimal if the heuristic is consistent.
+"""
+
+INF = float('inf')
+
+DEFAULT_MEMORY_LIMIT = 64 * 1024 * 1024 # bytes
+RECORD_OVERHEAD = 64 # approximate memory (in bytes) of a record in a list, beyond its own bytes
+READ_CHUNK_RECORDS = 4096 # records read from a file at a time
+WRITE_CHUNK_RECORDS = 4096 # records buffered per bucket before they are appended to its file
+
+
+def _read_records(path : str, record_size : int) -> Iterator[bytes]:
+    """ Streams the records of a file. """
+    with open(path, "rb") as file:
+        while True:
+            chunk = file.read(record_size * READ_CHUNK_RECORDS)
+            if not chunk:
+                return
+            for i in range(0, len(chunk), record_size):
+                yield chunk[i:i + record_size]
+
+
+def _find_record(path : str, record_size : int, key : bytes) -> Optional[bytes]:
+    """ Binary search of a sorted file for the record that starts with key. """
+    key_size = len(key)
+    with open(path, "rb") as file:
+        low, high = 0, os.path.getsize(path) // record_size
+        while low < high:
+            middle = (low + high) // 2
+            file.seek(middle * record_size)
+            record = file.read(record_size)
+            if record[:key_size] < key:
+                low = middle + 1
+            elif record[:key_size] > key:
+                high = middle
+            else:
+                return record
+    return None
+
+
+class _Bucket:
+    """ The states with one (g, h), in a file - unsorted while being filled, then sorted. """
+    g : float
+    h : float
+    path : str
+    pending : bytearray # records not yet appended to the file (while unsorted)
+    count : int # records written
+
+    def __init__(self, g : float, h : float, path : str):
+        self.g = g
+        self.h = h
+        self.path = path
+        self.pending = bytearray()
+        self.count = 0
+
+    def flush(self):
+        """ Append the pending records to the file. """
+        if self.pending:
+            with open(self.path, "ab") as file:
+                file.write(self.pending)
+            self.pending.clear()
+
+
+class ExternalAStarSearch(InformedSearchAgent):
+    """
+    External-memory A* (see above). Implements search() by itself.
+
+    spill_directory -- where to put the bucket files (in a temporary subdirectory, deleted after the search);
+        by default, the system's temporary directory.
+    memory_limit -- roughly how many bytes of records to sort in memory at once.
+
+    gui_callback_fn is called with each state extended, but as a root node (with no path) -
+    the states on disk don't keep their paths.
+    """
+    spill_directory : Optional[str]
+    memory_limit : int
+    records_written : int # in total, including sorted runs and buckets
+
+    def __init__(self, heuristic : Callable[[StateNode],float], spill_directory : Optional[str] = None,
+                memory_limit : int = DEFAULT_MEMORY_LIMIT, *args, **kwargs):
+        super().__init__(heuristic, *args, **kwargs)
+        self.spill_directory = spill_directory
+        self.memory_limit = memory_limit
+        self.records_written = 0
+
+    def get_cost(self, state : StateNode) -> float:
+        """ The g that buckets are ordered by (and the cutoff applies to): path cost (for A*). """
+        return state.path_cost
+
+    def set_cost(self, state : StateNode, g : float):
+        """ Restore g on a state rebuilt from its features. """
+        state.path_cost = g
+
+    def search(self,
+            initial_state : StateNode,
+            gui_callback_fn : Callable[[StateNode],bool] = no_callback,
+            cutoff : Union[int, float] = INF
+            ) -> Optional[StateNode]:
+        root = initial_state.get_as_root_node()
+        self._key_size = (root.get_features_bit_length() + 8) // 8 # at least one spare bit, for NO_PARENT
+        self._record_size = 2 * self._key_size
+        self._no_parent = b"\xff" * self._key_size
+        self._max_records = max(1024, self.memory_limit // (self._record_size + RECORD_OVERHEAD))
+        self._directory = tempfile.mkdtemp(prefix = "external_search_", dir = self.spill_directory)
+        self._buckets : Dict[Tuple[float, float], _Bucket] = {} # not yet extended
+        self._extended : Dict[float, List[_Bucket]] = {} # by h, in order of extension
+        self._file_number = 0
+        try:
+            return self._search(root, get_callback(gui_callback_fn), cutoff)
+        finally:
+            shutil.rmtree(self._directory, ignore_errors = True)
+
+    def _search(self,
+            root : StateNode,
+            callback : Optional[Callable[[StateNode],bool]],
+            cutoff : Union[int, float]
+            ) -> Optional[StateNode]:
+        key_size = self._key_size
+        h = self.heuristic(root)
+        if h == INF:
+            return None
+        self._add(0, h, self._key(root.get_state_features()) + self._no_parent)
+
+        while self._buckets:
+            g, h = min(self._buckets, key = lambda gh: (gh[0] + gh[1], gh[0]))
+            bucket = self._close(self._buckets.pop((g, h)))
+            for record in _read_records(bucket.path, self._record_size):
+                state = root.state_from_features(int.from_bytes(record[:key_size], "big"))
+                self.set_cost(state, g)
+
+                if state.is_goal_state():
+                    return self._reconstruct(root, record, g)
+
+                if callback is not None and callback(state):
+                    return None
+
+                parent_key = record[:key_size]
+                for action in state.get_all_actions():
+                    child = state.get_next_state(action)
+                    child_g = self.get_cost(child)
+                    if child_g >= cutoff:
+                        continue
+                    child_h = self.heuristic(child)
+                    if child_h == INF:
+                        continue
+                    self._add(child_g, child_h, self._key(child.get_state_features()) + parent_key)
+                    self.total_enqueues += 1
+                self.total_extends += 1
+        return None
+
+    def _key(self, features : int) -> bytes:
+        return features.to_bytes(self._key_size, "big")
+
+    def _new_path(self, kind : str) -> str:
+        self._file_number += 1
+        return os.path.join(self._directory, "{}_{}.bin".format(kind, self._file_number))
+
+    def _add(self, g : float, h : float, record : bytes):
+        """ Append a record to bucket (g, h). """
+        bucket = self._buckets.get((g, h))
+        if bucket is None:
+            bucket = self._buckets[(g, h)] = _Bucket(g, h, self._new_path("bucket"))
+        bucket.pending += record
+        bucket.count += 1
+        if len(bucket.pending) >= WRITE_CHUNK_RECORDS * self._record_size:
+            bucket.flush()
+        self.records_written += 1
+
+    def _close(self, bucket : _Bucket) -> _Bucket:
+        """ Sort the bucket's records and remove duplicates (delayed duplicate detection, see above);
+        then keep it as extended.
+        """
+        bucket.flush()
+        # Sort in runs that fit in memory
+        runs = []
+        records = _read_records(bucket.path, self._record_size)
+        while True:
+            chunk = sorted(record for _, record in zip(range(self._max_records), records))
+            if not chunk:
+                break
+            run = self._new_path("run")
+            with open(run, "wb") as file:
+                file.write(b"".join(chunk))
+            self.records_written += len(chunk)
+            runs.append(run)
+        os.remove(bucket.path)
+
+        # Merge the runs, leaving out duplicates and states extended with a lower g
+        key_size = self._key_size
+        previous = [old for old in self._extended.get(bucket.h, []) if old.g < bucket.g]
+        seen = (record[:key_size] for record in heapq.merge(*(_read_records(old.path, self._record_size) for old in previous)))
+        seen_key = next(seen, None)
+        last_key = None
+        bucket.path = self._new_path("sorted")
+        bucket.count = 0
+        with open(bucket.path, "wb") as file:
+            for record in heapq.merge(*(_read_records(run, self._record_size) for run in runs)):
+                key = record[:key_size]
+                if key == last_key:
+                    continue
+                last_key = key
+                while seen_key is not None and seen_key < key:
+                    seen_key = next(seen, None)
+                if seen_key == key:
+                    continue
+                file.write(record)
+                bucket.count += 1
+        self.records_written += bucket.count
+        for run in runs:
+            os.remove(run)
+        self._extended.setdefault(bucket.h, []).append(bucket)
+        return bucket
+
+    def _reconstruct(self, root : StateNode, record : bytes, g : float) -> StateNode:
+        """ The backward pass: follow parent keys through the extended buckets back to the root,
+        then replay the path forward from the root.
+        """
+        key_size = self._key_size
+        keys = [record[:key_size]]
+        parent_key = record[key_size:]
+        while parent_key != self._no_parent:
+            parent = root.state_from_features(int.from_bytes(parent_key, "big"))
+            h = self.heuristic(parent)
+            found = None
+            for bucket in self._extended.get(h, []):
+                if bucket.g < g:
+                    found = _find_record(bucket.path, self._record_size, parent_key)
+                    if found is not None:
+                        g = bucket.g
+                        break
+            if found is None:
+                raise RuntimeError("External search lost the parent of a state")
+            keys.append(parent_key)
+            parent_key = found[key_size:]
+        keys.reverse()
+
+        state = root
+        for key in keys[1:]:
+            features = int.from_bytes(key, "big")
+            state = min((child for child in (state.get_next_state(action) for action in state.get_all_actions())
+                            if child.get_state_features() == features), key = lambda child: child.path_cost)
+        return state
+
+
+class ExternalBreadthFirstSearch(ExternalAStarSearch):
+    """
+    External-memory breadth-first search: external A* (see above) with g the depth (number of actions) and no heuristic,
+    so each bucket is one layer of the breadth-first search. Finds the solution with the fewest actions.
+    """
+
+    def __init__(self, heuristic : Callable[[StateNode],float] = zero_heuristic, *args, **kwargs):
+        super().__init__(zero_heuristic, *args, **kwargs)
+
+    def get_cost(self, state : StateNode) -> float:
+        return state.depth
+
+    def set_cost(self, state : StateNode, g : float):
+        state.depth = g
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from search_portfolio import PROBLEMS, _problem_of
+    parser = argparse.ArgumentParser(description = "Solve one problem instance with external-memory A* (or breadth-first search).")
+    parser.add_argument("filename")
+    parser.add_argument("heuristic", nargs = "?", default = None, help = "default: breadth-first search")
+    parser.add_argument("--problem", choices = PROBLEMS.keys(), help = "default: guessed from the file")
+    parser.add_argument("--spill-directory", default = None)
+    parser.add_argument("--memory-limit", type = int, default = DEFAULT_MEMORY_LIMIT, help = "bytes")
+    args = parser.parse_args()
+
+    state_class, heuristics, _ = PROBLEMS[args.problem or _problem_of(args.filename)]
+    if args.heuristic is None:
+        agent = ExternalBreadthFirstSearch(spill_directory = args.spill_directory, memory_limit = args.memory_limit)
+    else:
+        agent = ExternalAStarSearch(heuristics[args.heuristic], spill_directory = args.spill_directory, memory_limit = args.memory_limit)
+    started = time.time()
+    solution = agent.search(state_class.readFromFile(args.filename))
+    print("Solution: {}".format("none" if solution is None else "cost {}, {} steps".format(solution.path_cost, solution.depth)))
+    print("{:.3f}s, {} extends, {} enqueues, {} records written".format(
+            time.time() - started, agent.total_extends, agent.total_enqueues, agent.records_written))
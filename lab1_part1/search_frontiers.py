@@ -0,0 +1,244 @@
+from __future__ import annotations
+from typing import List, Dict, Tuple, Hashable, Any, Optional, Deque
+from collections import deque
+"""
+Frontier data structures for the cost-ordered search strategies (UCS, Greedy, A*).
+
+A plain heapq list keeps every enqueued copy of a state, and needs the StateNodes themselves to be
+comparable to break ties. The IndexedPriorityQueue instead files each item under a key
+(generally the state's features), so that each state is queued at most once and its priority
+can be lowered in place ("decrease-key").
+
+When every priority is a small non-negative integer - as with unit or 1/2 step costs and integer
+heuristics - the BucketPriorityQueue (Dial's algorithm) does the same job in amortized O(1) per operation.
+"""
+
+class IndexedPriorityQueue:
+    """ A binary min-heap of items, each filed under a hashable key.
+
+    Priorities are tuples (e.g. (f, h) for A*), compared lexicographically. Ties between equal
+    priorities are broken by insertion order - first in, first out by default, or last in, first out
+    if lifo is True - so items themselves are never compared.
+
+    At most one item is queued per key. Pushing a key that is already queued replaces its item only if
+    the new priority is lower, moving it up the heap (decrease-key). Membership tests are O(1);
+    push and pop are O(log n).
+    """
+    # Each heap entry is a list [sort_key, key, item], where sort_key is priority + (insertion counter,)
+    _heap : List[list]
+    _index : Dict[Hashable, int] # key -> position of its entry in _heap
+    _counter : int
+    _counter_step : int
+
+    def __init__(self, lifo : bool = False):
+        self._heap = []
+        self._index = {}
+        self._counter = 0
+        self._counter_step = -1 if lifo else 1
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, key : Hashable) -> bool:
+        return key in self._index
+
+    def priority_of(self, key : Hashable) -> Optional[Tuple]:
+        """ Returns the priority that key is queued with, or None if it is not queued. """
+        i = self._index.get(key)
+        return None if i is None else self._heap[i][0][:-1]
+
+    def peek_priority(self) -> Tuple:
+        """ Returns the lowest priority in the queue, without removing anything. """
+        return self._heap[0][0][:-1]
+
+    def push(self, key : Hashable, priority : Tuple, item : Any) -> bool:
+        """ Queue item under key with the given priority, or lower the priority of key if already queued.
+        Returns False (and changes nothing) if key is already queued with an equal or lower priority.
+        """
+        self._counter += self._counter_step
+        i = self._index.get(key)
+        if i is None:
+            i = len(self._heap)
+            self._heap.append([priority + (self._counter,), key, item])
+            self._index[key] = i
+        else:
+            entry = self._heap[i]
+            if entry[0][:-1] <= priority:
+                return False
+            entry[0] = priority + (self._counter,)
+            entry[2] = item
+        self._sift_up(i)
+        return True
+
+    def pop(self) -> Any:
+        """ Remove and return the item with the lowest priority. """
+        heap = self._heap
+        last = heap.pop()
+        if heap:
+            top = heap[0]
+            heap[0] = last
+            self._index[last[1]] = 0
+            self._sift_down(0)
+        else:
+            top = last
+        del self._index[top[1]]
+        return top[2]
+
+    def _sift_up(self, i : int):
+        heap, index = self._heap, self._index
+        entry = heap[i]
+        sort_key = entry[0]
+        while i > 0:
+            parent_i = (i - 1) >> 1
+            parent = heap[parent_i]
+            if not sort_key < parent[0]:
+                break
+            heap[i] = parent
+            index[parent[1]] = i
+            i = parent_i
+        heap[i] = entry
+        index[entry[1]] = i
+
+    def _sift_down(self, i : int):
+        heap, index = self._heap, self._index
+        n = len(heap)
+        entry = heap[i]
+        sort_key = entry[0]
+        while True:
+            child_i = 2 * i + 1
+            if child_i >= n:
+                break
+            right_i = child_i + 1
+            if right_i < n and heap[right_i][0] < heap[child_i][0]:
+                child_i = right_i
+            child = heap[child_i]
+            if not child[0] < sort_key:
+                break
+            heap[i] = child
+            index[child[1]] = i
+            i = child_i
+        heap[i] = entry
+        index[entry[1]] = i
+
+
+class BucketPriorityQueue:
+    """ A bucket queue (Dial's algorithm) with the same interface as IndexedPriorityQueue.
+
+    Items are placed in a bucket indexed by the first element of their priority, which must be 
+    a non-negative integer; within a bucket, ties are broken by insertion order only (FIFO, or LIFO if lifo is True). 
+    Since the lowest non-empty bucket only moves forward as UCS or A* (with a consistent heuristic) proceeds,
+    push and pop are amortized O(1).
+
+    Lowering the priority of a queued key files a new entry and leaves the old one behind to be skipped when popped.
+
+    If a priority that is not a non-negative integer is ever pushed (e.g. a fractional heuristic value),
+    all queued items are moved into an IndexedPriorityQueue, which is used from then on.
+    """
+    _buckets : List[Deque[Tuple[Hashable, tuple]]] # bucket i holds (key, entry) pairs with priority[0] == i
+    _entries : Dict[Hashable, tuple] # key -> its live entry, (priority, item)
+    _cursor : int # no live entries are in buckets below this index
+    _lifo : bool
+    _heap : Optional[IndexedPriorityQueue] # set once fallen back to a heap
+
+    def __init__(self, lifo : bool = False):
+        self._buckets = []
+        self._entries = {}
+        self._cursor = 0
+        self._lifo = lifo
+        self._heap = None
+
+    def __len__(self) -> int:
+        if self._heap is not None:
+            return len(self._heap)
+        return len(self._entries)
+
+    def __contains__(self, key : Hashable) -> bool:
+        if self._heap is not None:
+            return key in self._heap
+        return key in self._entries
+
+    def is_bucketed(self) -> bool:
+        """ Returns False if this queue has fallen back to a heap. """
+        return self._heap is None
+
+    def priority_of(self, key : Hashable) -> Optional[Tuple]:
+        """ Returns the priority that key is queued with, or None if it is not queued. """
+        if self._heap is not None:
+            return self._heap.priority_of(key)
+        entry = self._entries.get(key)
+        return None if entry is None else entry[0]
+
+    def peek_priority(self) -> Tuple:
+        """ Returns the lowest priority in the queue, without removing anything. """
+        if self._heap is not None:
+            return self._heap.peek_priority()
+        key, entry = self._find_next()
+        return entry[0]
+
+    def push(self, key : Hashable, priority : Tuple, item : Any) -> bool:
+        """ Queue item under key with the given priority, or lower the priority of key if already queued.
+        Returns False (and changes nothing) if key is already queued with an equal or lower priority.
+        """
+        if self._heap is not None:
+            return self._heap.push(key, priority, item)
+        p = priority[0]
+        if not ((type(p) is int or (type(p) is float and p.is_integer())) and p >= 0):
+            self._fall_back()
+            return self._heap.push(key, priority, item)
+
+        old = self._entries.get(key)
+        if old is not None and old[0] <= priority:
+            return False
+        entry = (priority, item)
+        self._entries[key] = entry
+
+        i = int(p)
+        buckets = self._buckets
+        while len(buckets) <= i:
+            buckets.append(deque())
+        buckets[i].append((key, entry))
+        if i < self._cursor:
+            self._cursor = i
+        return True
+
+    def pop(self) -> Any:
+        """ Remove and return the item with the lowest priority. """
+        if self._heap is not None:
+            return self._heap.pop()
+        key, entry = self._find_next()
+        if self._lifo:
+            self._buckets[self._cursor].pop()
+        else:
+            self._buckets[self._cursor].popleft()
+        del self._entries[key]
+        return entry[1]
+
+    def _find_next(self) -> Tuple[Hashable, tuple]:
+        """ Advance the cursor to the next live entry, discarding stale ones, and return it (without removing it). """
+        if not self._entries:
+            raise IndexError("pop from an empty priority queue")
+        buckets, entries = self._buckets, self._entries
+        i = self._cursor
+        while True:
+            bucket = buckets[i]
+            while bucket:
+                key, entry = bucket[-1] if self._lifo else bucket[0]
+                if entries.get(key) is entry:
+                    self._cursor = i
+                    return key, entry
+                if self._lifo:
+                    bucket.pop()
+                else:
+                    bucket.popleft()
+            i += 1
+
+    def _fall_back(self):
+        """ Move all live entries, in order, into an IndexedPriorityQueue. """
+        heap = IndexedPriorityQueue(lifo = self._lifo)
+        for bucket in self._buckets[self._cursor:]:
+            for key, entry in bucket:
+                if self._entries.get(key) is entry:
+                    heap.push(key, entry[0], entry[1])
+        self._heap = heap
+        self._buckets = []
+        self._entries = {}
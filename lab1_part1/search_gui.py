@@ -6,15 +6,26 @@ Usage:
 """
 from __future__ import annotations
 from traceback import format_exc
-from time import time, sleep
+from time import time
+import queue
+import threading
 from tkinter import * # Tk, Canvas, Frame, Listbox, Button, Checkbutton, IntVar, StringVar, Spinbox, Label
 from typing import *
 
 from search_problem import StateNode, Action
-from search_algorithms import GoalSearchAgent, ALL_AGENTS
+from search_algorithms import GoalSearchAgent, ALL_AGENTS, no_callback
 
 INF = float('inf')
 
+REDRAW_INTERVAL = 0.03 # seconds; at most one state update is queued per interval while running with no step time
+UPDATE_POLL_MS = 20 # how often the Tk side drains the queued updates
+
+# Updates queued by the search worker for the Tk side, as tuples whose first item is one of these:
+NODE = "node" # (NODE, node, detailed) -- show the node the search is at (detailed: print and analyze it, whatever the options)
+STATUS = "status" # (STATUS, new status, expected status) -- change the status, if it is still the expected one
+FINISHED = "finished" # (FINISHED, solution, elapsed seconds) -- the search returned
+ERROR = "error" # (ERROR, traceback) -- the search raised an exception
+
 class Search_GUI(Tk):
     STEP_TIME_OPTIONS = (0.00, 0.01, 0.02, 0.03, 0.04, 0.05, 0.06, 0.07, 0.08, 0.09,
                     0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 2.0, 5.0)
@@ -105,6 +116,16 @@ class Search_GUI(Tk):
         while(self.cutoff_spinbox.get() != "INF") :
             self.cutoff_spinbox.invoke('buttonup')
 
+        self.check_feasibility_option_var = IntVar()
+        self.check_feasibility_option_checkbox = Checkbutton(cutoffs_frame, text='Check feasibility first?', variable=self.check_feasibility_option_var)
+        self.check_feasibility_option_checkbox.grid(row= 1, column = 0, columnspan = 2, sticky = NW)
+        self.check_feasibility_option_var.set(1)
+
+        self.profile_option_var = IntVar()
+        self.profile_option_checkbox = Checkbutton(cutoffs_frame, text='Profile search phases?', variable=self.profile_option_var)
+        self.profile_option_checkbox.grid(row= 2, column = 0, columnspan = 2, sticky = NW)
+        self.profile_option_var.set(0)
+
 
         self.reset_button = Button(controls_frame, text="Terminate Search", # End Epochs early / restart
                             width = 15, pady = 3)
@@ -191,6 +212,10 @@ class Search_GUI(Tk):
         self.agent_info_label_2 = Label(info_frame, text = '', fg = "blue", anchor = CENTER)
         self.agent_info_label_2.grid(row= 5,sticky = NW)
 
+        self.agent_profile_label = Label(info_frame, text = '', fg = "blue", justify = LEFT, anchor = W)
+        self.agent_profile_label.config(font=("Courier", 10))
+        self.agent_profile_label.grid(row= 6,sticky = NW)
+
 
         #########################################################################################
 
@@ -201,6 +226,7 @@ class Search_GUI(Tk):
         if not self.print_agent_info_option_var.get():
             self.agent_info_label_1['text'] = ""
             self.agent_info_label_2['text'] = ""
+            self.agent_profile_label['text'] = ""
 
     def on_print_state_info_option_click(self):
         if not self.print_state_info_option_var.get():
@@ -219,6 +245,12 @@ class Search_GUI(Tk):
     def get_cutoff(self):
         return float(self.cutoff_spinbox.get())
 
+    def get_check_feasibility(self) -> bool:
+        return bool(self.check_feasibility_option_var.get())
+
+    def get_profiling(self) -> bool:
+        return bool(self.profile_option_var.get())
+
     def get_algorithm_selection(self) -> str:
         return self.algorithm_listbox.get(self.algorithm_listbox.curselection()[0])
 
@@ -228,6 +260,14 @@ class Search_GUI(Tk):
     def get_heuristic_selection(self) -> Callable[[StateNode], float]:
         return self.heuristics[self.heuristic_listbox.get(self.heuristic_listbox.curselection()[0])]
 
+    def set_strategy_names(self, strategy_names : Sequence[str]):
+        """ Replace the listed strategies, keeping the current selection if it is still listed. """
+        strategy_names = list(strategy_names)
+        current = self.get_strategy_selection() if self.strategy_listbox.curselection() else None
+        self.strategy_listbox.delete(0, END)
+        self.strategy_listbox.insert(END, *strategy_names)
+        self.strategy_listbox.select_set(strategy_names.index(current) if current in strategy_names else 0)
+
     def update_state(self, state : StateNode, please_draw : Optional[bool] = None, please_print : Optional[bool] = None, please_analyze : Optional[bool] = None):
         self.current_state = state
         if please_print is True or (please_print is None and self.print_state_info_option_var.get()):
@@ -243,6 +283,7 @@ class Search_GUI(Tk):
         if please_print is True or (please_print is None and self.print_agent_info_option_var.get()):
             self.agent_info_label_1['text'] = ('Total Extends: {}'.format(agent.total_extends))
             self.agent_info_label_2['text'] = ('Total Enqueues: {}'.format(agent.total_enqueues))
+            self.agent_profile_label['text'] = '' if agent.profile is None else str(agent.profile)
 
 
     def redraw(self):
@@ -289,6 +330,7 @@ class Status:
         pass
     @staticmethod
     def alg_callback(app: Search_GUI_Controller, node : StateNode) -> bool:
+        """ Called on the search worker thread, for each dequeued node; must not touch the GUI directly. """
         raise NotImplementedError
     @staticmethod
     def handle_click_canvas(app : Search_GUI_Controller, event = None):
@@ -312,6 +354,8 @@ class Waiting_Base(Status):
 
         # Can choose new algorithm settings
         gui.cutoff_spinbox['state'] = NORMAL
+        gui.check_feasibility_option_checkbox['state'] = NORMAL
+        gui.profile_option_checkbox['state'] = NORMAL
 
         gui.algorithm_listbox['state'] = NORMAL
         gui.strategy_listbox['state'] = NORMAL
@@ -421,6 +465,8 @@ class Running_Base(Status):
         gui.reset_button['bg'] = 'red'
 
         gui.cutoff_spinbox['state'] = "readonly"
+        gui.check_feasibility_option_checkbox['state'] = DISABLED
+        gui.profile_option_checkbox['state'] = DISABLED
 
         # Cannot choose new algorithm settings during execution, give at least visual indication
         gui.algorithm_listbox['state'] = DISABLED
@@ -440,10 +486,9 @@ class Running_Base(Status):
 
     @staticmethod
     def alg_callback(app: Search_GUI_Controller, node: StateNode) -> bool:
-        app.gui.update_state(node)
-        app.gui.update_agent(app.current_agent)
-        app.gui.update_idletasks()
-        app.sleep_update_tk(app.gui.get_step_time())
+        app.post_node(node)
+        if app.step_time > 0:
+            app.wait_for_status_change(app.status, timeout = app.step_time)
         return False
 
 class Running(Running_Base):
@@ -503,14 +548,11 @@ class Running_Step(Running_Base):
     @staticmethod
     def alg_callback(app: Search_GUI_Controller, node: StateNode) -> bool:
         # Definitely want to see the info if we step...
-        app.gui.update_state(node, please_print=True, please_draw=True, please_analyze=True)
-        app.gui.update_agent(app.current_agent, please_print=True)
-        app.gui.update_idletasks()
-        app.sleep_update_tk(app.gui.get_step_time())
+        app.post_node(node, detailed = True)
 
-        app.update_status_and_ui(Running_Paused)
-        while app.status == Running_Paused:
-            app.sleep_update_tk(.25) # Wait until status changes
+        app.post_status(Running_Paused, Running_Step)
+        app.wait_for_status_change(Running_Step)
+        app.wait_for_status_change(Running_Paused) # Wait until status changes
         return False
 
 class Running_Paused(Running_Base):
@@ -548,8 +590,7 @@ class Running_Paused(Running_Base):
 
     @staticmethod
     def alg_callback(app: Search_GUI_Controller, node: StateNode) -> bool:
-        while app.status == Running_Paused:
-            app.sleep_update_tk(.25) # Wait until status changes
+        app.wait_for_status_change(Running_Paused) # Wait until status changes
         return app.status.alg_callback(app, node) # Run whatever the new status' callback is, ultimately
 
 class Running_Blind(Running_Base):
@@ -591,7 +632,6 @@ class Running_Terminating(Running_Base):
 
     @staticmethod
     def alg_callback(app: Search_GUI_Controller, node: StateNode) -> bool:
-        Running_Base.alg_callback(app, node)
         return True
 
 class Algorithm_Error(Status):
@@ -634,20 +674,40 @@ class Status_Transition_Error(Status):
 
 
 class Search_GUI_Controller:
+    """
+    Runs each search on a worker thread, so the window stays responsive and the search isn't slowed by redrawing.
+
+    The worker never touches Tk: through the status' alg_callback, it queues (throttled) updates in self.updates,
+    which the Tk side drains every UPDATE_POLL_MS with after(). Pausing, stepping and terminating are status changes
+    made on the Tk side, which the worker checks at each node (waiting on self.status_changed while paused).
+    A search started blind is run with no_callback, at full headless speed.
+    """
     gui : Search_GUI 
     initial_state: StateNode
     status : Type[Status]
     current_agent : GoalSearchAgent
     heuristics : Dict[str, Callable[[StateNode], float]]
-
-    def __init__(self, gui: Search_GUI, initial_state: StateNode, heuristics : Dict[str,Callable[[StateNode], float]]):
+    agents : Dict[str, Dict[str, Type[GoalSearchAgent]]] # agent classes by algorithm and strategy names
+    worker : Optional[threading.Thread] # the running search, if any
+    updates : queue.Queue # from the worker to the Tk side
+    status_changed : threading.Condition # notified on every status change
+    step_time : float # the GUI's step time, as last read on the Tk side (the worker can't read it)
+
+    def __init__(self, gui: Search_GUI, initial_state: StateNode, heuristics : Dict[str,Callable[[StateNode], float]],
+                agents : Dict[str, Dict[str, Type[GoalSearchAgent]]] = ALL_AGENTS):
         self.gui = gui
         self.initial_state = initial_state
         self.heuristics = heuristics
+        self.agents = agents
         self.gui.update_state(initial_state, please_draw=True, please_print=True, please_analyze=False)
         self.bind_commands_to_gui()
         
         self.current_agent = None
+        self.worker = None
+        self.updates = queue.Queue()
+        self.status_changed = threading.Condition()
+        self.step_time = self.gui.get_step_time()
+        self.next_redraw = 0.0
 
         self.status = Initiating
         self.update_status_and_ui(Initial_Waiting)
@@ -657,6 +717,9 @@ class Search_GUI_Controller:
         self.gui.canvas.bind('<Configure>', lambda *args : self.gui.redraw() )
         self.gui.canvas.bind('<Button-1>', lambda e : self.status.handle_click_canvas(self, e))
         self.gui.history_button['command'] = lambda : self.handle_history_button()
+        # Not every algorithm can be paired with every strategy
+        self.gui.algorithm_listbox.bind('<<ListboxSelect>>', 
+            lambda e : self.gui.set_strategy_names(self.agents[self.gui.get_algorithm_selection()].keys()))
 
         #Status-dependent commands
         self.gui.reset_button['command'] = lambda : self.status.handle_reset_button(self)
@@ -668,12 +731,14 @@ class Search_GUI_Controller:
     def update_status_and_ui(self, newstatus : Type[Status]):
         if self.status is newstatus:
             return
-        if newstatus is Algorithm_Error or self.status.is_valid_transition_to(newstatus):
-            self.status = newstatus
-        else:
-            Status_Transition_Error.to_status = newstatus
-            Status_Transition_Error.from_status = self.status
-            self.status = Status_Transition_Error
+        with self.status_changed:
+            if newstatus is Algorithm_Error or self.status.is_valid_transition_to(newstatus):
+                self.status = newstatus
+            else:
+                Status_Transition_Error.to_status = newstatus
+                Status_Transition_Error.from_status = self.status
+                self.status = Status_Transition_Error
+            self.status_changed.notify_all()
         self.gui.status_label['text'] = self.status.get_status_text(type(self.current_agent).__name__)
         self.status.update_ui(self.gui)
         self.gui.update_idletasks()
@@ -692,8 +757,11 @@ class Search_GUI_Controller:
     def get_agent_selection(self) -> GoalSearchAgent:
         alg = self.gui.get_algorithm_selection()
         strat = self.gui.get_strategy_selection()
-        agent_class = ALL_AGENTS[alg][strat]
-        return agent_class(heuristic = self.gui.get_heuristic_selection())
+        agent_class = self.agents[alg][strat]
+        agent = agent_class(heuristic = self.gui.get_heuristic_selection())
+        if self.gui.get_profiling():
+            agent.enable_profiling()
+        return agent
 
 
 
@@ -704,22 +772,51 @@ class Search_GUI_Controller:
         self.current_agent = self.get_agent_selection()
         self.update_status_and_ui(status)
         try:
-            self.run_search()
+            self.run_search(gui_callback_fn = no_callback if status is Running_Blind else self.alg_callback)
         except Exception:
             print(format_exc())
             if self.status != Status_Transition_Error:
                 self.update_status_and_ui(Algorithm_Error)
 
 
-    def run_search(self):
+    def run_search(self, check_feasibility : Optional[bool] = None, gui_callback_fn : Optional[Callable[[StateNode], bool]] = None):
+        """ Start the current agent's search from the current state, on a worker thread; returns right away.
+        If check_feasibility (by default, the GUI's option) is True, the problem-specific feasibility check runs first,
+        and if it proves the problem infeasible, the search is not run at all. 
+        gui_callback_fn defaults to self.alg_callback.
+        """
         # Assume self.current_agent has been initialized
-        start_time = time()
-        solution_state : StateNode = self.current_agent.search(initial_state = self.gui.current_state.get_as_root_node(),
-                                                                gui_callback_fn = self.alg_callback,
-                                                                cutoff = self.gui.get_cutoff())   
-        elapsed_time = time() - start_time
-
+        if check_feasibility is None:
+            check_feasibility = self.gui.get_check_feasibility()
+        if gui_callback_fn is None:
+            gui_callback_fn = self.alg_callback
+        search = self.current_agent.search_if_feasible if check_feasibility else self.current_agent.search
+        # Read everything from the GUI here; the worker can't
+        initial_state = self.gui.current_state.get_as_root_node()
+        cutoff = self.gui.get_cutoff()
+        self.step_time = self.gui.get_step_time()
+
+        def work():
+            try:
+                start_time = time()
+                solution_state = search(initial_state = initial_state, gui_callback_fn = gui_callback_fn, cutoff = cutoff)
+                self.updates.put((FINISHED, solution_state, time() - start_time))
+            except Exception:
+                self.updates.put((ERROR, format_exc()))
+
+        self.worker = threading.Thread(target = work, daemon = True)
+        self.worker.start()
+        self.gui.after(UPDATE_POLL_MS, self.drain_updates)
+
+    def finish_search(self, solution_state : Optional[StateNode], elapsed_time : float):
+        """ Show the result of the search that just returned. """
         print("{} ran for {:.4f} seconds.".format(type(self.current_agent).__name__, elapsed_time))
+        if self.current_agent.infeasible_reason is not None:
+            print("Infeasible, search skipped: {}".format(self.current_agent.infeasible_reason))
+        if solution_state is None and self.current_agent.memory_exhausted:
+            print("Ran out of memory: some paths were cut off, so a solution may still exist.")
+        if self.current_agent.profile is not None:
+            print(self.current_agent.profile)
 
         self.gui.update_agent(self.current_agent, please_print=True)
         if solution_state is not None:
@@ -735,24 +832,74 @@ class Search_GUI_Controller:
                 self.update_status_and_ui(Terminated_Waiting)
             else:
                 self.update_status_and_ui(Finished_Failure_Waiting)
-            
-            
-        self.sleep_update_tk(.1)
-
-    def sleep_update_tk(self, secs : float, interval : float = .05):
-        '''
-        Sleep for a time while continuing to update the tkinter gui.
-        '''
+                if self.current_agent.infeasible_reason is not None:
+                    self.gui.status_label['text'] = "Infeasible: {}".format(self.current_agent.infeasible_reason)
+                elif self.current_agent.memory_exhausted:
+                    self.gui.status_label['text'] = "Out of memory: no solution found within the memory budget"
+
+    def drain_updates(self):
+        """ On the Tk side: handle everything the worker has queued, drawing only the latest node.
+        Reschedules itself until the search is over.
+        """
         try:
-            self.gui.update()
-            t = 0.0
-            while t < secs:
-                sleep(interval)
-                self.gui.update()
-                t += interval
-        except TclError as e:
-            if "application has been destroyed" not in e.args[0]:
-                raise
+            self.step_time = self.gui.get_step_time()
+        except ValueError:
+            pass # being edited; keep the last one
+        latest_node = None
+        while self.worker is not None:
+            try:
+                update = self.updates.get_nowait()
+            except queue.Empty:
+                break
+            if update[0] == NODE:
+                latest_node = update
+                continue
+            if latest_node is not None:
+                self.show_node(latest_node[1], latest_node[2])
+                latest_node = None
+            if update[0] == STATUS:
+                if self.status is update[2]:
+                    self.update_status_and_ui(update[1])
+            elif update[0] == FINISHED:
+                self.worker = None
+                self.finish_search(update[1], update[2])
+            elif update[0] == ERROR:
+                self.worker = None
+                print(update[1])
+                if self.status != Status_Transition_Error:
+                    self.update_status_and_ui(Algorithm_Error)
+        if latest_node is not None:
+            self.show_node(latest_node[1], latest_node[2])
+        if self.worker is not None:
+            self.gui.after(UPDATE_POLL_MS, self.drain_updates)
+
+    def show_node(self, node : StateNode, detailed : bool):
+        if detailed:
+            self.gui.update_state(node, please_print=True, please_draw=True, please_analyze=True)
+            self.gui.update_agent(self.current_agent, please_print=True)
+        else:
+            self.gui.update_state(node)
+            self.gui.update_agent(self.current_agent)
+
+    #### Called on the worker thread, by the status' alg_callback
+
+    def post_node(self, node : StateNode, detailed : bool = False):
+        """ Queue the node to be shown - unless one was queued less than REDRAW_INTERVAL ago 
+        (and there is no step time, or details are wanted).
+        """
+        now = time()
+        if detailed or self.step_time > 0 or now >= self.next_redraw:
+            self.updates.put((NODE, node, detailed))
+            self.next_redraw = now + REDRAW_INTERVAL
+
+    def post_status(self, newstatus : Type[Status], expected : Type[Status]):
+        """ Queue a status change, to be made only if the status is still the expected one by then. """
+        self.updates.put((STATUS, newstatus, expected))
+
+    def wait_for_status_change(self, status : Type[Status], timeout : Optional[float] = None):
+        """ Wait until the status is no longer the given one (or the timeout passes). """
+        with self.status_changed:
+            self.status_changed.wait_for(lambda : self.status is not status, timeout)
 
     def alg_callback(self, node : StateNode) -> bool:
         return self.status.alg_callback(self, node)
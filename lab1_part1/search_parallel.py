@@ -0,0 +1,301 @@
+from __future__ import annotations
+from typing import List, Dict, Tuple, Optional, Callable, Union, Hashable, Any
+import heapq
+import multiprocessing
+import queue
+import time
+
+from search_problem import StateNode, Action
+from search_algorithms import InformedSearchAgent, no_callback
+"""
+Hash Distributed A* (HDA*): A* spread over several worker processes.
+
+Every state has an owner - the worker numbered by a hash of its features - which alone keeps its
+best-known path cost (g) and its place in an open list. A worker repeatedly extends the best state of its own
+open list, and sends each child to the child's owner, in batches (one batch per destination), over a queue.
+So the workers never share memory or locks, and duplicate detection stays exact: the same state always goes to the same worker.
+
+The first solution found is not necessarily optimal, because the workers extend their states in parallel.
+Its cost is broadcast as the incumbent, and the search goes on until no worker has a state whose
+estimated total cost (g + h) is below the incumbent - so with an admissible heuristic, the final incumbent is optimal.
+
+Termination is detected by the main process with Mattern's four-counter method: it repeatedly asks all the workers
+(a "wave") for the number of batches each has sent and received, which they answer only once they are idle.
+Once two consecutive waves report the same counts, and every batch sent was received, no work can be left anywhere.
+
+The states are pickled to be sent between processes, without their parents; each worker remembers, for each state it
+owns, the features of its parent and its last action. The solution path is traced back through the workers by those,
+and then rebuilt from the initial state in the main process.
+Workers are forked, so any StateNode subclass and heuristic will do, as long as the StateNodes can be pickled.
+"""
+
+INF = float('inf')
+
+BATCH_SIZE = 64 # children queued for another worker before the batch is sent
+FLUSH_EVERY = 16 # extends between sending all pending batches, even if not full
+
+_MIX = 0x9E3779B97F4A7C15 # Fibonacci hashing multiplier, to spread similar hashes over the workers
+_MASK64 = (1 << 64) - 1
+
+def owner_of(features : Hashable, num_workers : int) -> int:
+    """ The worker that owns the state with the given features. """
+    return (((hash(features) * _MIX) & _MASK64) >> 32) % num_workers
+
+
+# Messages, as tuples whose first item is one of these:
+STATES = "states" # (STATES, [(state, parent features), ...]) -- to a worker: candidate states it owns
+INCUMBENT = "incumbent" # (INCUMBENT, cost) -- to a worker: the cheapest solution cost found so far
+PROBE = "probe" # (PROBE, wave) -- to a worker: report counters once idle
+TRACE = "trace" # (TRACE, features) -- to a worker: report the parent of a state it owns
+STOP = "stop" # (STOP,) -- to a worker: exit
+GOAL = "goal" # (GOAL, cost, features) -- from a worker: found a solution
+REPORT = "report" # (REPORT, wave, worker, sent, received, extends, enqueues) -- from a worker: answer to PROBE
+PARENT = "parent" # (PARENT, parent features or None, last action) -- from a worker: answer to TRACE
+ERROR = "error" # (ERROR, description) -- from a worker: it crashed
+
+
+class _Worker:
+    """ The search state of one worker process. """
+
+    def __init__(self, index : int, inboxes : List[Any], results : Any, heuristic : Callable[[StateNode], float], cutoff : float):
+        self.index = index
+        self.inbox = inboxes[index]
+        self.inboxes = inboxes
+        self.results = results
+        self.heuristic = heuristic
+        self.cutoff = cutoff
+        self.open : List[Tuple[float, float, int, StateNode]] = [] # heap of (g + h, h, tiebreak, state)
+        self.counter = 0
+        self.best : Dict[Hashable, Tuple[float, Optional[Hashable], Optional[Action]]] = {} # features -> (g, parent features, last action)
+        self.outboxes : List[List[Tuple[StateNode, Hashable]]] = [[] for _ in inboxes]
+        self.incumbent = INF
+        self.sent = 0 # batches
+        self.received = 0 # batches
+        self.extends = 0
+        self.enqueues = 0
+        self.probe : Optional[int] = None # wave of a PROBE waiting for this worker to be idle
+
+    def run(self):
+        try:
+            while True:
+                # Work through all the messages that have arrived; block for one only if there is nothing else to do
+                while True:
+                    idle = not self.has_work()
+                    if idle:
+                        self.flush_all()
+                        if self.probe is not None:
+                            self.results.put((REPORT, self.probe, self.index, self.sent, self.received, self.extends, self.enqueues))
+                            self.probe = None
+                    try:
+                        message = self.inbox.get() if idle else self.inbox.get_nowait()
+                    except queue.Empty:
+                        break
+                    if not self.handle(message):
+                        return
+                for _ in range(FLUSH_EVERY):
+                    if not self.has_work():
+                        break
+                    self.extend()
+                self.flush_all()
+        except Exception as e:
+            self.results.put((ERROR, "worker {}: {!r}".format(self.index, e)))
+
+    def has_work(self) -> bool:
+        """ Whether some open state could still lead to a solution cheaper than the incumbent. """
+        return bool(self.open) and self.open[0][0] < self.incumbent
+
+    def handle(self, message : Tuple) -> bool:
+        """ Handle one message; returns False on STOP. """
+        kind = message[0]
+        if kind == STATES:
+            self.received += 1
+            for state, parent_features in message[1]:
+                self.consider(state, parent_features)
+        elif kind == INCUMBENT:
+            self.incumbent = min(self.incumbent, message[1])
+        elif kind == PROBE:
+            self.probe = message[1]
+        elif kind == TRACE:
+            _, parent_features, action = self.best[message[1]]
+            self.results.put((PARENT, parent_features, action))
+        elif kind == STOP:
+            return False
+        return True
+
+    def consider(self, state : StateNode, parent_features : Optional[Hashable]):
+        """ Open a state this worker owns, unless it was already reached as cheaply. """
+        features = state.get_state_features()
+        old = self.best.get(features)
+        if old is not None and old[0] <= state.path_cost:
+            return
+        self.best[features] = (state.path_cost, parent_features, state.last_action)
+        h = self.heuristic(state)
+        if state.path_cost + h < self.incumbent:
+            self.counter += 1
+            heapq.heappush(self.open, (state.path_cost + h, h, self.counter, state))
+            self.enqueues += 1
+
+    def extend(self):
+        """ Extend the best open state, sending each child to its owner. """
+        _, _, _, state = heapq.heappop(self.open)
+        features = state.get_state_features()
+        if state.path_cost > self.best[features][0]:
+            return # stale: reached more cheaply since
+        if state.is_goal_state():
+            if state.path_cost < self.incumbent:
+                self.incumbent = state.path_cost
+                self.results.put((GOAL, state.path_cost, features))
+            return
+        self.extends += 1
+        num_workers = len(self.inboxes)
+        for action in state.get_all_actions():
+            child = state.get_next_state(action)
+            if child.path_cost >= self.cutoff:
+                continue
+            child.parent = None
+            owner = owner_of(child.get_state_features(), num_workers)
+            if owner == self.index:
+                self.consider(child, features)
+            else:
+                outbox = self.outboxes[owner]
+                outbox.append((child, features))
+                if len(outbox) >= BATCH_SIZE:
+                    self.flush(owner)
+
+    def flush(self, owner : int):
+        if self.outboxes[owner]:
+            self.inboxes[owner].put((STATES, self.outboxes[owner]))
+            self.outboxes[owner] = []
+            self.sent += 1
+
+    def flush_all(self):
+        for owner in range(len(self.outboxes)):
+            self.flush(owner)
+
+
+def _run_worker(index : int, inboxes : List[Any], results : Any, heuristic : Callable[[StateNode], float], cutoff : float):
+    _Worker(index, inboxes, results, heuristic, cutoff).run()
+
+
+class HashDistributedAStarSearch(InformedSearchAgent):
+    """
+    Hash Distributed A* (see above), with num_workers worker processes (by default, one per CPU).
+
+    Returns an optimal solution if the heuristic is admissible. Implements search() by itself.
+    gui_callback_fn is never called - the states are extended in other processes.
+
+    After a search, total_extends and total_enqueues are summed over the workers;
+    worker_extends has each worker's extends, and load_imbalance is the most any worker extended, over the mean.
+    """
+    num_workers : int
+    worker_extends : List[int]
+    load_imbalance : float
+
+    def __init__(self, heuristic : Callable[[StateNode],float], num_workers : Optional[int] = None, *args, **kwargs):
+        super().__init__(heuristic, *args, **kwargs)
+        self.num_workers = num_workers or multiprocessing.cpu_count()
+        self.worker_extends = []
+        self.load_imbalance = 1.0
+
+    def search(self,
+            initial_state : StateNode,
+            gui_callback_fn : Callable[[StateNode],bool] = no_callback,
+            cutoff : Union[int, float] = INF
+            ) -> Optional[StateNode]:
+        n = self.num_workers
+        context = multiprocessing.get_context("fork")
+        inboxes = [context.Queue() for _ in range(n)]
+        results = context.Queue()
+        workers = [context.Process(target = _run_worker, args = (i, inboxes, results, self.heuristic, cutoff), daemon = True)
+                    for i in range(n)]
+        for worker in workers:
+            worker.start()
+
+        def receive() -> Tuple:
+            while True:
+                try:
+                    message = results.get(timeout = 1.0)
+                except queue.Empty:
+                    if not all(worker.is_alive() for worker in workers):
+                        raise RuntimeError("A search worker process died")
+                    continue
+                if message[0] == ERROR:
+                    raise RuntimeError(message[1])
+                return message
+
+        try:
+            root = initial_state.get_as_root_node()
+            inboxes[owner_of(root.get_state_features(), n)].put((STATES, [(root, None)]))
+            sent = 1 # the batch with the root
+
+            incumbent, goal_features = INF, None
+            previous_counts = None
+            wave = 0
+            while True:
+                for inbox in inboxes:
+                    inbox.put((PROBE, wave))
+                reports = {}
+                while len(reports) < n:
+                    message = receive()
+                    if message[0] == GOAL and message[1] < incumbent:
+                        incumbent, goal_features = message[1], message[2]
+                        for inbox in inboxes:
+                            inbox.put((INCUMBENT, incumbent))
+                    elif message[0] == REPORT and message[1] == wave:
+                        reports[message[2]] = message[3:]
+                counts = [reports[i][:2] for i in range(n)]
+                if counts == previous_counts and sent + sum(s for s, _ in counts) == sum(r for _, r in counts):
+                    break
+                previous_counts = counts
+                wave += 1
+
+            self.worker_extends = [reports[i][2] for i in range(n)]
+            self.total_extends += sum(self.worker_extends)
+            self.total_enqueues += sum(reports[i][3] for i in range(n))
+            mean = sum(self.worker_extends) / n
+            self.load_imbalance = max(self.worker_extends) / mean if mean > 0 else 1.0
+
+            if goal_features is None:
+                return None
+            # Trace the solution's actions back through the workers, then replay them from the root
+            actions = []
+            features = goal_features
+            while True:
+                inboxes[owner_of(features, n)].put((TRACE, features))
+                message = receive()
+                while message[0] != PARENT:
+                    message = receive()
+                _, features, action = message
+                if features is None:
+                    break
+                actions.append(action)
+            state = root
+            for action in reversed(actions):
+                state = state.get_next_state(action)
+            return state
+        finally:
+            for inbox in inboxes:
+                inbox.put((STOP,))
+            for worker in workers:
+                worker.join(timeout = 1.0)
+                if worker.is_alive():
+                    worker.terminate()
+
+
+if __name__ == "__main__":
+    import argparse
+    from search_portfolio import PROBLEMS, _problem_of
+    parser = argparse.ArgumentParser(description = "Solve one problem instance with Hash Distributed A*.")
+    parser.add_argument("filename")
+    parser.add_argument("heuristic")
+    parser.add_argument("--problem", choices = PROBLEMS.keys(), help = "default: guessed from the file")
+    parser.add_argument("--workers", type = int, default = None)
+    args = parser.parse_args()
+
+    state_class, heuristics, _ = PROBLEMS[args.problem or _problem_of(args.filename)]
+    agent = HashDistributedAStarSearch(heuristics[args.heuristic], num_workers = args.workers)
+    started = time.time()
+    solution = agent.search(state_class.readFromFile(args.filename))
+    print("Solution: {}".format("none" if solution is None else "cost {}, {} steps".format(solution.path_cost, solution.depth)))
+    print("{:.3f}s, {} extends, {} enqueues".format(time.time() - started, agent.total_extends, agent.total_enqueues))
+    print("Extends per worker: {} (load imbalance {:.2f})".format(agent.worker_extends, agent.load_imbalance))
@@ -0,0 +1,249 @@
+from __future__ import annotations
+from typing import List, Dict, Set, Tuple, Sequence, Optional, Callable, Type, NamedTuple
+import argparse
+import multiprocessing
+import queue
+import time
+
+from search_problem import StateNode, Action
+from search_algorithms import GoalSearchAgent, ALL_AGENTS
+from search_profiler import SearchProfile
+from slidepuzzle_problem import SlidePuzzleState
+from slidepuzzle_heuristics import SLIDEPUZZLE_HEURISTICS
+from roomba_problem import RoombaState
+from roomba_heuristics import ROOMBA_HEURISTICS
+from spotlessroomba_problem import SpotlessRoombaState
+from spotlessroomba_heuristics import SPOTLESSROOMBA_HEURISTICS
+from spotlessroomba_tsp import SPOTLESSROOMBA_AGENTS
+"""
+A portfolio solver: runs several agent configurations (algorithm x strategy x heuristic) at once,
+each in its own process, on the same problem instance.
+
+Which agent does best depends heavily on the instance, so racing a few complementary ones is often faster
+than guessing. The portfolio either returns the first solution found and cancels the rest (first = True),
+or lets every configuration run until the deadline and returns the cheapest solution.
+Either way it reports each configuration's counters and timing, to help choose the default portfolios.
+
+Processes can't share StateNodes, so each worker reads the instance from its file, and sends back
+its solution as the list of actions; the solution path is rebuilt from the initial state in the main process.
+
+Run from the command line, e.g.
+    python search_portfolio.py slidepuzzle_files/test_puzzle4x4-40.slidepuzzle --deadline 30
+"""
+
+INF = float('inf')
+
+POLL_SECONDS = 1.0 # how often to check that the workers are still alive, while waiting for results
+
+# For each problem: its StateNode class, named heuristics, and agents
+PROBLEMS : Dict[str, Tuple[Type[StateNode], Dict[str, Callable[[StateNode], float]], Dict[str, Dict[str, Type[GoalSearchAgent]]]]] = {
+    "slidepuzzle": (SlidePuzzleState, SLIDEPUZZLE_HEURISTICS, ALL_AGENTS),
+    "roomba": (RoombaState, ROOMBA_HEURISTICS, ALL_AGENTS),
+    "spotlessroomba": (SpotlessRoombaState, SPOTLESSROOMBA_HEURISTICS, SPOTLESSROOMBA_AGENTS),
+}
+
+class Configuration(NamedTuple):
+    """ One agent of a portfolio: keys into the problem's agents (algorithm, strategy) and heuristics. """
+    algorithm : str
+    strategy : str
+    heuristic : str
+
+    def __str__(self) -> str:
+        return "{} {} {}".format(self.algorithm, self.strategy, self.heuristic)
+
+# Complementary configurations for each problem
+DEFAULT_PORTFOLIOS : Dict[str, List[Configuration]] = {
+    "slidepuzzle": [
+        Configuration("graph", "astar", "Linear Conflict"),
+        Configuration("graph", "astar-bucket", "Linear Conflict"),
+        Configuration("iterative-deepening", "astar", "Linear Conflict"),
+        Configuration("bidirectional", "astar", "Manhattan"),
+    ],
+    "roomba": [
+        Configuration("graph", "astar", "Maze Distance (exact)"),
+        Configuration("graph", "ucs-bucket", "Zero"),
+        Configuration("bidirectional", "ucs", "Zero"),
+    ],
+    "spotlessroomba": [
+        Configuration("held-karp", "tsp", "Zero"),
+        Configuration("graph", "astar", "Maze MST"),
+        Configuration("graph", "astar-bucket", "Maze MST"),
+    ],
+}
+
+# Status of a PortfolioResult
+SOLVED = "solved" # found a solution
+FAILED = "failed" # finished without finding a solution
+OUT_OF_MEMORY = "no memory" # finished without finding a solution, but cut some paths off for lack of memory (see memory_exhausted)
+CANCELLED = "cancelled" # stopped, because another configuration finished first or the deadline passed
+ERROR = "error" # raised an exception
+
+class PortfolioResult(NamedTuple):
+    """ What one configuration of a portfolio did. """
+    configuration : Configuration
+    status : str
+    path_cost : Optional[float] # of the solution, if SOLVED
+    actions : Optional[List[Action]] # of the solution, from the initial state, if SOLVED
+    total_extends : Optional[int] # None if CANCELLED
+    total_enqueues : Optional[int] # None if CANCELLED
+    seconds : float # wall time from the start of the portfolio
+    error : Optional[str] = None # if ERROR
+    profile : Optional[SearchProfile] = None # if profiled, and not CANCELLED
+
+    def __str__(self) -> str:
+        return "{:<45} {:<9} cost {:<6} extends {:<9} enqueues {:<9} {:.3f}s{}".format(
+            str(self.configuration), self.status, "-" if self.path_cost is None else self.path_cost,
+            "-" if self.total_extends is None else self.total_extends,
+            "-" if self.total_enqueues is None else self.total_enqueues,
+            self.seconds, "" if self.error is None else "  " + self.error)
+
+
+def _run_configuration(problem : str, filename : str, configuration : Configuration, cutoff : float, profile : bool,
+                        started : float, results : multiprocessing.Queue):
+    """ The worker process: searches with one configuration and puts its PortfolioResult on results. """
+    try:
+        state_class, heuristics, agents = PROBLEMS[problem]
+        initial_state = state_class.readFromFile(filename)
+        agent = agents[configuration.algorithm][configuration.strategy](heuristic = heuristics[configuration.heuristic])
+        if profile:
+            agent.enable_profiling()
+        solution = agent.search(initial_state, cutoff = cutoff)
+        if solution is None:
+            result = PortfolioResult(configuration, OUT_OF_MEMORY if agent.memory_exhausted else FAILED, None, None,
+                                        agent.total_extends, agent.total_enqueues,
+                                        time.time() - started, profile = agent.profile)
+        else:
+            actions = [state.last_action for state in solution.get_path()[1:]]
+            result = PortfolioResult(configuration, SOLVED, solution.path_cost, actions, agent.total_extends, agent.total_enqueues,
+                                        time.time() - started, profile = agent.profile)
+    except Exception as e:
+        result = PortfolioResult(configuration, ERROR, None, None, None, None, time.time() - started, repr(e))
+    results.put(result)
+
+
+def run_portfolio(problem : str,
+                filename : str,
+                configurations : Optional[Sequence[Configuration]] = None,
+                first : bool = True,
+                deadline : float = INF,
+                max_workers : Optional[int] = None,
+                cutoff : float = INF,
+                profile : bool = False
+                ) -> Tuple[Optional[StateNode], List[PortfolioResult]]:
+    """ Runs the configurations (by default, DEFAULT_PORTFOLIOS[problem]) on the instance read from filename.
+
+    If first is True, returns as soon as any configuration finds a solution, cancelling the others;
+    otherwise, waits for all of them (until deadline seconds have passed), and returns the cheapest solution.
+    At most max_workers configurations run at once (by default, all of them - they race even on fewer CPUs, 
+    sharing them); the rest wait their turn, in order.
+    If profile is True, each configuration's search phases are timed (see search_profiler.py), in its result's profile.
+
+    Returns the solution (as a StateNode path from the initial state, or None if none was found), and
+    a PortfolioResult for each configuration, in the order given.
+    """
+    if problem not in PROBLEMS:
+        raise ValueError("Unknown problem {!r}; expected one of {}".format(problem, ", ".join(PROBLEMS)))
+    state_class, heuristics, agents = PROBLEMS[problem]
+    if configurations is None:
+        configurations = DEFAULT_PORTFOLIOS[problem]
+    for configuration in configurations:
+        if configuration.strategy not in agents.get(configuration.algorithm, {}) or configuration.heuristic not in heuristics:
+            raise ValueError("Unknown configuration {}".format(configuration))
+    if max_workers is None:
+        max_workers = len(configurations)
+
+    started = time.time()
+    results_queue = multiprocessing.Queue()
+    waiting = list(configurations)
+    running : Dict[Configuration, multiprocessing.Process] = {}
+    results : Dict[Configuration, PortfolioResult] = {}
+    best : Optional[PortfolioResult] = None
+    exited : Set[Configuration] = set() # workers seen to have exited, without a result yet
+
+    try:
+        while waiting or running:
+            while waiting and len(running) < max_workers:
+                configuration = waiting.pop(0)
+                process = multiprocessing.Process(target = _run_configuration, daemon = True,
+                                    args = (problem, filename, configuration, cutoff, profile, started, results_queue))
+                process.start()
+                running[configuration] = process
+            try:
+                result = results_queue.get(timeout = min(POLL_SECONDS, max(0.0, started + deadline - time.time())))
+            except queue.Empty:
+                if time.time() >= started + deadline:
+                    break # deadline passed
+                # A worker that died without posting a result (e.g. killed for memory) would otherwise be waited for forever.
+                # One that exited normally may still have its result in flight, so it gets one more poll.
+                for configuration, process in list(running.items()):
+                    if not process.is_alive():
+                        if process.exitcode == 0 and configuration not in exited:
+                            exited.add(configuration)
+                            continue
+                        process.join()
+                        running.pop(configuration)
+                        results[configuration] = PortfolioResult(configuration, ERROR, None, None, None, None, time.time() - started,
+                                                    "worker process died (exit code {})".format(process.exitcode))
+                continue
+            if result.configuration not in running:
+                continue # from a worker already recorded as dead
+            running.pop(result.configuration).join()
+            results[result.configuration] = result
+            if result.status == SOLVED and (best is None or result.path_cost < best.path_cost):
+                best = result
+                if first:
+                    break
+    finally:
+        # Cancel whatever is still running (or never started)
+        for configuration, process in running.items():
+            process.terminate()
+        for configuration, process in running.items():
+            process.join()
+            results[configuration] = PortfolioResult(configuration, CANCELLED, None, None, None, None, time.time() - started)
+        for configuration in waiting:
+            results[configuration] = PortfolioResult(configuration, CANCELLED, None, None, None, None, 0.0)
+        results_queue.close()
+
+    solution = None
+    if best is not None:
+        solution = state_class.readFromFile(filename)
+        for action in best.actions:
+            solution = solution.get_next_state(action)
+    return solution, [results[configuration] for configuration in configurations]
+
+
+def _problem_of(filename : str) -> str:
+    """ Guesses the problem from the file: a slide puzzle by its extension; 
+    a roomba file is a spotless roomba problem if it has more than one dirty spot.
+    """
+    if filename.endswith(".slidepuzzle"):
+        return "slidepuzzle"
+    if bin(SpotlessRoombaState.readFromFile(filename).dirty_mask).count("1") > 1:
+        return "spotlessroomba"
+    return "roomba"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Race several search agents on one problem instance.")
+    parser.add_argument("filename")
+    parser.add_argument("--problem", choices = PROBLEMS.keys(), help = "default: guessed from the file")
+    parser.add_argument("--config", nargs = 3, action = "append", metavar = ("ALGORITHM", "STRATEGY", "HEURISTIC"),
+                        help = "a configuration to run (may be repeated); default: the problem's default portfolio")
+    parser.add_argument("--best", action = "store_true", help = "run everything until the deadline and keep the cheapest solution")
+    parser.add_argument("--deadline", type = float, default = INF, help = "seconds")
+    parser.add_argument("--workers", type = int, default = None)
+    parser.add_argument("--profile", action = "store_true", help = "time each configuration's search phases")
+    args = parser.parse_args()
+
+    problem = args.problem or _problem_of(args.filename)
+    configurations = None if args.config is None else [Configuration(*config) for config in args.config]
+    solution, results = run_portfolio(problem, args.filename, configurations, first = not args.best,
+                                    deadline = args.deadline, max_workers = args.workers, profile = args.profile)
+    for result in results:
+        print(result)
+        if result.profile is not None:
+            print(result.profile)
+    if solution is None:
+        print("No solution found")
+    else:
+        print("Solution: cost {}, {} steps".format(solution.path_cost, solution.depth))
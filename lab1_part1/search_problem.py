@@ -28,7 +28,10 @@ class StateNode:
     It also serves as a search tree "node" which includes information about the state's
     parent, last action taken (that leads to this state), and the length/cost of the path
     that led to this state.
+
+    Subclasses may declare __slots__ for their own instance variables, to make nodes smaller and faster.
     """
+    __slots__ = ('parent', 'last_action', 'depth', 'path_cost')
 
     # Type Hints allow for the optional type declaration of instance variables, like Java
     parent : StateNode
@@ -112,6 +115,48 @@ class StateNode:
         """
         raise NotImplementedError
     
+    def get_goal_states(self) -> Iterable[StateNode]:
+        """Returns an initial (root) StateNode for every goal state of this problem.
+
+        Only needed to search backward from the goal, e.g. by bidirectional search. 
+        Problems whose goal states can't be listed can leave this unimplemented.
+        """
+        raise NotImplementedError
+
+    def get_previous_states(self) -> Iterable[StateNode]:
+        """Returns a StateNode for every state from which some action leads to this state.
+
+        This is the reverse of get_next_state, used to search backward from a goal state.
+        Each returned StateNode should have this StateNode (self) as its parent, one more depth,
+        and path_cost increased by the cost of the action from it to this state. 
+        Its last_action should be that action, so get_next_state(last_action) on it leads back to this state.
+        """
+        raise NotImplementedError
+
+    def check_feasibility(self) -> Optional[str]:
+        """Returns a reason (str) if a goal is provably unreachable from this state, or None if it may be reachable.
+
+        Meant to be a quick check (much cheaper than searching), run before searching to avoid exhausting the 
+        whole state space on unsolvable problems. By default, no check is done and None is returned.
+        """
+        return None
+
+    def get_features_bit_length(self) -> int:
+        """Returns the most bits that get_state_features() needs, for any state of this problem, if it is a (non-negative) int.
+
+        Only needed to store states as fixed-width records, e.g. by external-memory search.
+        Problems whose features aren't ints can leave this unimplemented.
+        """
+        raise NotImplementedError
+
+    def state_from_features(self, features : Hashable) -> StateNode:
+        """Returns an initial (root) StateNode of this same problem, with the given state features.
+
+        The inverse of get_state_features; only needed to search states stored by their features alone, 
+        e.g. by external-memory search. Problems can leave this unimplemented.
+        """
+        raise NotImplementedError
+
     def get_path(self) -> Sequence[StateNode]:
         """Returns a sequence (list) of StateNodes representing the path from the initial state to this state.
 
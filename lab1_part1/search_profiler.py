@@ -0,0 +1,146 @@
+from __future__ import annotations
+from typing import Dict, List, Callable, Any, Iterator, Type
+from contextlib import contextmanager
+from time import perf_counter
+import threading
+"""
+Per-phase timing of a search's hot path, to see which phase dominates on each problem.
+
+A SearchProfile accumulates, for each phase (see PHASES), the number of calls and the time spent in them.
+Times are exclusive: a phase called from within another (e.g. the heuristic, from A*'s enqueue) is only counted
+in the inner one. Whatever the search does outside the phases (its own loop and bookkeeping) is "other".
+
+The phases are timed by wrapping the functions that implement them (see GoalSearchAgent.enable_profiling),
+so nothing is added to the search loops themselves - with profiling off, it costs nothing at all.
+With it on, every timed call costs a few hundred nanoseconds more, which is charged to "other".
+
+The agent's own methods (enqueue, dequeue, heuristic) are wrapped on the agent. But states are created by
+the problem's code, so the goal test, action generation and get_next_state can only be wrapped on the state class itself:
+while any profiled search of that class runs, these methods are replaced for the whole process.
+Only calls made on the thread of a profiled search are counted (in that search's profile); calls from other threads -
+e.g. the GUI drawing a node, or another agent's search - just pay for a thread-local lookup.
+"""
+
+# The phases, in the order they are reported
+DEQUEUE = "dequeue"
+GOAL_TEST = "goal test"
+ACTIONS = "actions"
+NEXT_STATE = "get_next_state"
+HEURISTIC = "heuristic"
+DUPLICATE_CHECK = "duplicate check"
+ENQUEUE = "enqueue"
+PHASES = (DEQUEUE, GOAL_TEST, ACTIONS, NEXT_STATE, HEURISTIC, DUPLICATE_CHECK, ENQUEUE)
+
+# The StateNode methods timed on the state class, by phase
+STATE_METHODS = ((GOAL_TEST, "is_goal_state"), (ACTIONS, "get_all_actions"), (NEXT_STATE, "get_next_state"))
+
+_current = threading.local() # .profile is the SearchProfile of the profiled search running on this thread, if any
+_patch_lock = threading.Lock()
+_patched : Dict[Type, List] = {} # state class -> [number of profiled searches running on it, {method name: original or None}]
+
+
+def _dispatching(phase : str, fn : Callable) -> Callable:
+    """ Wraps a state class's method, so that calls on a profiled search's thread are timed in its profile. """
+    def wrapper(*args, **kwargs):
+        profile = getattr(_current, "profile", None)
+        if profile is None:
+            return fn(*args, **kwargs)
+        return profile._call(phase, fn, args, kwargs)
+    wrapper._profiled_original = fn
+    return wrapper
+
+
+class SearchProfile:
+    """ Calls and (exclusive) seconds per phase, and the total seconds of the searches profiled. """
+    calls : Dict[str, int]
+    seconds : Dict[str, float]
+    total_seconds : float
+
+    def __init__(self):
+        self.calls = {phase : 0 for phase in PHASES}
+        self.seconds = {phase : 0.0 for phase in PHASES}
+        self.total_seconds = 0.0
+        self._nested = 0.0 # time spent in timed calls within the current one (only used on the search's thread)
+
+    def _call(self, phase : str, fn : Callable, args : tuple, kwargs : dict) -> Any:
+        outer = self._nested
+        self._nested = 0.0
+        start = perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            self.seconds[phase] += elapsed - self._nested
+            self.calls[phase] += 1
+            self._nested = outer + elapsed
+
+    def timed(self, phase : str, fn : Callable) -> Callable:
+        """ Wraps fn, so that each call (on the thread of a search profiled by this) is counted and timed in phase. """
+        def wrapper(*args, **kwargs):
+            if getattr(_current, "profile", None) is not self:
+                return fn(*args, **kwargs)
+            return self._call(phase, fn, args, kwargs)
+        return wrapper
+
+    @contextmanager
+    def profiling(self, state_class : Type) -> Iterator[None]:
+        """ Profile the search run in the with block, on this thread, whose states are of state_class:
+        while in it, the phases timed by this profile are counted, state_class's STATE_METHODS are timed (see above),
+        and the block's time is added to total_seconds.
+        """
+        with _patch_lock:
+            entry = _patched.get(state_class)
+            if entry is None:
+                originals = {}
+                for phase, name in STATE_METHODS:
+                    originals[name] = state_class.__dict__.get(name)
+                    method = getattr(state_class, name)
+                    # If inherited from a class that is being profiled too, wrap its original
+                    setattr(state_class, name, _dispatching(phase, getattr(method, "_profiled_original", method)))
+                entry = _patched[state_class] = [0, originals]
+            entry[0] += 1
+        outer = getattr(_current, "profile", None)
+        _current.profile = self
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.total_seconds += perf_counter() - start
+            _current.profile = outer
+            with _patch_lock:
+                entry[0] -= 1
+                if entry[0] == 0:
+                    del _patched[state_class]
+                    for name, original in entry[1].items():
+                        if original is None:
+                            delattr(state_class, name)
+                        else:
+                            setattr(state_class, name, original)
+
+    def timed_filter(self) -> Dict[Any, Any]:
+        """ An empty filter (dict from state features) whose get() lookups are timed as duplicate checks. """
+        return _TimedFilter(self)
+
+    def get_other_seconds(self) -> float:
+        return max(0.0, self.total_seconds - sum(self.seconds.values()))
+
+    def __str__(self) -> str:
+        lines = ["{:<16}{:>11}{:>10}{:>7}".format("Phase", "Calls", "Seconds", "%")]
+        total = self.total_seconds or 1.0
+        for phase in PHASES:
+            if self.calls[phase]:
+                lines.append("{:<16}{:>11}{:>10.3f}{:>6.1f}%".format(phase, self.calls[phase], self.seconds[phase],
+                                                                    100 * self.seconds[phase] / total))
+        other = self.get_other_seconds()
+        lines.append("{:<16}{:>11}{:>10.3f}{:>6.1f}%".format("other", "", other, 100 * other / total))
+        lines.append("{:<16}{:>11}{:>10.3f}".format("total", "", self.total_seconds))
+        return "\n".join(lines)
+
+
+class _TimedFilter(dict):
+    """ A search's filter (a dict from state features), whose lookups are timed as duplicate checks. """
+    get : Callable[..., Any]
+
+    def __init__(self, profile : SearchProfile):
+        super().__init__()
+        self.get = profile.timed(DUPLICATE_CHECK, super().get)
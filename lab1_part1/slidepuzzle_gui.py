@@ -5,7 +5,7 @@ from os import getcwd
 from sys import argv
 from slidepuzzle_problem import *
 from slidepuzzle_heuristics import SLIDEPUZZLE_HEURISTICS
-from search_algorithms import ALGORITHMS, STRATEGIES
+from search_algorithms import ALL_AGENTS, STRATEGIES
 from search_gui import Search_GUI, Search_GUI_Controller
 
 ### State visualization too big? Change these numbers
@@ -111,6 +111,6 @@ if __name__ == "__main__":
         file_path = filedialog.askopenfilename(title = "Open Slide Puzzle File",initialdir = getcwd(), filetypes=[("SlidePuzzle", ".slidepuzzle"), ("Text", ".txt")])
         initroot.destroy()
     initial_state = SlidePuzzleState.readFromFile(file_path)
-    gui = SlidePuzzle_GUI(initial_state,algorithm_names=ALGORITHMS.keys(), strategy_names=STRATEGIES.keys(), heuristics=SLIDEPUZZLE_HEURISTICS)
+    gui = SlidePuzzle_GUI(initial_state,algorithm_names=ALL_AGENTS.keys(), strategy_names=STRATEGIES.keys(), heuristics=SLIDEPUZZLE_HEURISTICS)
     controller = Search_GUI_Controller(gui, initial_state, SLIDEPUZZLE_HEURISTICS)
     gui.mainloop()
\ No newline at end of file
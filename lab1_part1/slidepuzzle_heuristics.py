@@ -2,6 +2,7 @@
 # Name(s): 
 from search_heuristics import *
 from slidepuzzle_problem import *
+from slidepuzzle_pdb import get_additive_pdb
 
 INF = float('inf')
 
@@ -11,44 +12,33 @@ INF = float('inf')
 
 """ Return the Hamming distance (number of tiles out of place) of the SlidePuzzleState """
 def slidepuzzle_hamming(state : SlidePuzzleState)  -> float:
-    num=0
-    ham=0
-    for row in state.tiles:
-        for col in row:
-            if(num!=0):
-                if(col!=num):
-                    ham+=1
-            num+=1
-    return ham
+    # Carried by the state, and updated in O(1) by get_next_state
+    return state.hamming
 
 """ Return the sum of Manhattan distances between tiles and goal of the SlidePuzzleState """
 def slidepuzzle_manhattan(state : SlidePuzzleState)  -> float:
-    num=0
-    man=0
-    
-    for currX in range(len(state.tiles)):
-        row = state.tiles[currX]
-
-        for currY in range (len(row)):
-            col = row[currY]
-            if(num!=0):
-                if (num != col):
-                    goalX= (int)(col % len(row))
-                    goalY= (int)(col / len(row))
-                    man += abs(goalX - currX) + abs(goalY - currY)
-            num += 1
-    return man            
-            
-
-
+    # Carried by the state, and updated in O(1) by get_next_state
+    return state.manhattan
 
+""" Return the sum of Manhattan distances plus the extra moves forced by linear conflicts: 
+tiles in their goal row (or column) but in the wrong order, so one must step out of the way of another."""
+def slidepuzzle_linear_conflict(state : SlidePuzzleState)  -> float:
+    return state.manhattan + state.get_linear_conflicts()
 
 [[0,1,2], [3,4,5], [4,5], [6,7]]
 
+""" Return the sum of the additive disjoint pattern database lookups for the SlidePuzzleState (see slidepuzzle_pdb.py).
+The databases for a puzzle size are loaded on the first call - and built first, if missing, for puzzles up to 3x3;
+the 4x4 ones must be built ahead of time (python slidepuzzle_pdb.py 4). """
+def slidepuzzle_additive_pdb(state : SlidePuzzleState)  -> float:
+    return get_additive_pdb(state.get_size())(state)
+
 SLIDEPUZZLE_HEURISTICS = {
     "Zero" : zero_heuristic, 
     "Arbitrary": arbitrary_heuristic, 
     "Hamming" : slidepuzzle_hamming,
-    "Manhattan" : slidepuzzle_manhattan
+    "Manhattan" : slidepuzzle_manhattan,
+    "Linear Conflict" : slidepuzzle_linear_conflict,
+    "Additive PDB" : slidepuzzle_additive_pdb
     }
 
@@ -0,0 +1,210 @@
+from __future__ import annotations
+from typing import List, Dict, Tuple, Sequence, Optional
+from collections import deque
+import mmap
+import os
+import sys
+
+from slidepuzzle_problem import SlidePuzzleState
+"""
+Additive disjoint pattern databases (PDBs) for the slide puzzle.
+
+The numbered tiles are partitioned into disjoint groups (patterns). For each pattern, a PDB stores,
+for every placement of the pattern's tiles and the blank on the board, the fewest moves *of those tiles* needed to bring
+them to their goal positions - the other tiles are treated as indistinguishable, and moving them is free.
+Because each move moves exactly one tile, and the patterns are disjoint, the sum of the lookups
+over all patterns never overestimates the true solution length: it is an admissible heuristic, and
+much more informed than Manhattan distance. It is consistent too, as each move changes one lookup by at most 1:
+that is why the blank's position is part of the key - the fewest moves over all its positions would only be admissible.
+
+Each PDB is built once by a backward breadth-first search from the goal, and saved as a file with
+one byte per placement and blank position, indexed by a perfect hash (the rank of the placement as a k-permutation
+of the board positions, times N*N, plus the blank's position).
+Loading memory-maps the file, so it costs (almost) nothing until entries are actually read.
+
+Building is quick for small puzzles (the 2x2 and 3x3 PDBs take seconds), so the heuristic builds those itself
+on first use. But it is slow for large patterns (minutes for the 5-tile patterns of the 4x4 puzzle), so the heuristic
+never builds those: run this module to build the default PDBs ahead of time, e.g.
+    python slidepuzzle_pdb.py 4
+"""
+
+PDB_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdb_cache")
+
+UNREACHED = 255 # byte value for placements not (yet) reached; also caps the stored move counts
+
+# Largest group size used by default_partition, by puzzle size N
+DEFAULT_PATTERN_SIZES = {2: 3, 3: 3, 4: 5}
+DEFAULT_PATTERN_SIZE = 4
+
+# Largest puzzle size whose default PDBs get_additive_pdb builds on first use; larger ones must be built ahead of time
+MAX_BUILD_ON_DEMAND_SIZE = 3
+
+
+def default_partition(n : int) -> List[Tuple[int, ...]]:
+    """ Splits the tiles 1 to N*N-1 into consecutive groups, e.g. 3-3-2 for the 3x3 puzzle and 5-5-5 for the 4x4 puzzle. """
+    size = DEFAULT_PATTERN_SIZES.get(n, DEFAULT_PATTERN_SIZE)
+    tiles = list(range(1, n * n))
+    return [tuple(tiles[i:i + size]) for i in range(0, len(tiles), size)]
+
+
+class PatternDatabase:
+    """ The PDB for one pattern (group of tiles) of the N-by-N puzzle.
+
+    Positions on the board are numbered row by row, 0 to N*N-1; in the goal, tile t is at position t.
+    A placement of the pattern (the positions of its tiles, in pattern order) is ranked as a
+    k-permutation of the N*N positions; the table has an entry for each placement and position of the blank,
+    so exactly N*N * N*N! / (N*N-k)! entries (those with the blank on a pattern tile are unused).
+    """
+    n : int
+    tiles : Tuple[int, ...]
+    table : Optional[mmap.mmap]
+    _multipliers : List[int] # rank = sum of digit_i * _multipliers[i]
+    _popcount : bytes # number of set bits of each mask of board positions below a position
+
+    def __init__(self, n : int, tiles : Sequence[int]):
+        self.n = n
+        self.tiles = tuple(tiles)
+        self.table = None
+        cells, k = n * n, len(self.tiles)
+        self._multipliers = [0] * k
+        m = 1
+        for i in range(k - 1, -1, -1):
+            self._multipliers[i] = m
+            m *= cells - i
+        self.size = m * cells
+        self._popcount = bytes(bin(mask).count("1") for mask in range(1 << cells)) if cells <= 16 else b""
+
+    def filename(self) -> str:
+        return os.path.join(PDB_DIRECTORY, "pdb_{0}x{0}_{1}_blank.bin".format(self.n, "-".join(str(t) for t in self.tiles)))
+
+    def rank(self, positions : Sequence[int]) -> int:
+        """ The perfect hash of a placement: its number among the k-permutations of the positions. """
+        r = 0
+        used = 0
+        popcount = self._popcount
+        for p, m in zip(positions, self._multipliers):
+            below = used & ((1 << p) - 1)
+            r += (p - (popcount[below] if popcount else bin(below).count("1"))) * m
+            used |= 1 << p
+        return r
+
+    def lookup(self, where : Sequence[int]) -> int:
+        """ The number of moves of the pattern's tiles needed, where where[t] is the position of tile t (and where[0] of the blank). """
+        return self.table[self.rank([where[t] for t in self.tiles]) * self.n * self.n + where[0]]
+
+    def load(self, build : bool = True) -> PatternDatabase:
+        """ Memory-map the table from its file, building (and saving) it first if there is no file and build is True. """
+        path = self.filename()
+        if not os.path.exists(path):
+            if not build:
+                raise FileNotFoundError(path)
+            self.save(self.build())
+        with open(path, "rb") as file:
+            self.table = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        if len(self.table) != self.size:
+            raise ValueError("{} has {} entries, expected {}".format(path, len(self.table), self.size))
+        return self
+
+    def save(self, table : bytearray):
+        """ Write the table to its file (atomically, so a partly written file is never loaded). """
+        os.makedirs(PDB_DIRECTORY, exist_ok = True)
+        path = self.filename()
+        temp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(temp_path, "wb") as file:
+            file.write(table)
+        os.replace(temp_path, path)
+
+    def build(self) -> bytearray:
+        """ Compute the table by breadth-first search backward from the goal.
+
+        The abstract states are the placements of the pattern's tiles plus the position of the blank.
+        Moving a pattern tile into the blank costs 1; moving any other tile costs 0, so the search is a
+        0-1 BFS (0-cost successors go to the front of the queue). Each abstract state's entry is its lowest cost.
+        Abstract states are packed into ints, `bits` bits per position, with the blank in the lowest bits.
+        """
+        n, k = self.n, len(self.tiles)
+        cells = n * n
+        bits = max(1, (cells - 1).bit_length())
+        mask = (1 << bits) - 1
+        neighbors = [[q for q in (p - n, p + n, p - 1 if p % n else -1, p + 1 if (p + 1) % n else -1) if 0 <= q < cells]
+                        for p in range(cells)]
+
+        dist = bytearray([UNREACHED]) * (1 << (bits * (k + 1)))
+        start = 0
+        for i, t in enumerate(self.tiles):
+            start |= t << (bits * (i + 1))
+        dist[start] = 0 # blank at position 0
+        queue = deque([start])
+        table = bytearray([UNREACHED]) * self.size
+        rank = self.rank
+
+        while queue:
+            state = queue.popleft()
+            d = dist[state]
+            blank = state & mask
+            placement = state >> bits
+            positions = [(placement >> (bits * i)) & mask for i in range(k)]
+            r = rank(positions) * cells + blank
+            if d < table[r]:
+                table[r] = d
+            for q in neighbors[blank]:
+                if q in positions:
+                    # slide pattern tile i from q into the blank
+                    i = positions.index(q)
+                    nd = d + 1 if d + 1 < UNREACHED else UNREACHED - 1
+                    next_state = ((placement ^ ((q ^ blank) << (bits * i))) << bits) | q
+                    if nd < dist[next_state]:
+                        dist[next_state] = nd
+                        queue.append(next_state)
+                else:
+                    next_state = (placement << bits) | q
+                    if d < dist[next_state]:
+                        dist[next_state] = d
+                        queue.appendleft(next_state)
+        return table
+
+
+class AdditivePatternDatabase:
+    """ A heuristic for N-by-N SlidePuzzleStates: the sum of the PDB lookups for a disjoint partition of the tiles. """
+    n : int
+    pdbs : List[PatternDatabase]
+
+    def __init__(self, n : int, partition : Optional[Sequence[Sequence[int]]] = None, build : bool = True):
+        if partition is None:
+            partition = default_partition(n)
+        seen = [t for group in partition for t in group]
+        if len(seen) != len(set(seen)) or not all(0 < t < n * n for t in seen):
+            raise ValueError("partition must be disjoint groups of tiles 1 to {}".format(n * n - 1))
+        self.n = n
+        self.pdbs = [PatternDatabase(n, group).load(build = build) for group in partition]
+
+    def __call__(self, state : SlidePuzzleState) -> float:
+        where = state.get_tile_positions()
+        return sum(pdb.lookup(where) for pdb in self.pdbs)
+
+
+_DEFAULT_PDBS : Dict[int, AdditivePatternDatabase] = {}
+
+def get_additive_pdb(n : int) -> AdditivePatternDatabase:
+    """ Returns the AdditivePatternDatabase with the default partition for N-by-N puzzles, loading it on first use
+    (and building it first, if N is at most MAX_BUILD_ON_DEMAND_SIZE).
+    Raises FileNotFoundError if the tables of a larger puzzle haven't been built (by running this module).
+    """
+    pdb = _DEFAULT_PDBS.get(n)
+    if pdb is None:
+        try:
+            pdb = _DEFAULT_PDBS[n] = AdditivePatternDatabase(n, build = n <= MAX_BUILD_ON_DEMAND_SIZE)
+        except FileNotFoundError as e:
+            raise FileNotFoundError("The pattern databases for the {0}x{0} puzzle haven't been built ({1} is missing); "
+                                    "build them first with: python slidepuzzle_pdb.py {0}".format(n, e.args[0])) from e
+    return pdb
+
+
+if __name__ == "__main__":
+    # Build (if not already built) the default PDBs for the given puzzle sizes
+    for arg in sys.argv[1:] or ["3", "4"]:
+        n = int(arg)
+        for group in default_partition(n):
+            pdb = PatternDatabase(n, group)
+            print("Loading/building {} ...".format(pdb.filename()), flush = True)
+            pdb.load()
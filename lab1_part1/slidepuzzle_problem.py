@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 from typing import Optional, Any, Hashable, Sequence, Iterable, Dict, Union, List, Tuple, NamedTuple
+from functools import lru_cache
 
 from search_problem import StateNode, Action
 
@@ -25,12 +26,84 @@ class Coordinate(NamedTuple, Action):
     def __eq__(self,other:Coordinate):
         return self.r == other.r and self.c == other.c
 
+class _BoardTables:
+    """ Precomputed tables for N-by-N boards, shared by all SlidePuzzleStates of that size.
+
+    Positions are numbered row by row, 0 to N*N-1. A board is packed into an int with `width` bits per position
+    (4 bits for up to 4x4, so at most 64 bits): the tile at position p is (board >> shifts[p]) & mask.
+    In the goal, tile t is at position t (so the empty spot is at position 0).
+    """
+    __slots__ = ('n', 'width', 'mask', 'shifts', 'coords', 'moves', 'goal', 'distance')
+
+    def __init__(self, n : int):
+        cells = n * n
+        self.n = n
+        self.width = max(4, (cells - 1).bit_length())
+        self.mask = (1 << self.width) - 1
+        self.shifts = tuple(self.width * p for p in range(cells))
+        self.coords = tuple(Coordinate(*divmod(p, n)) for p in range(cells))
+        # moves[p] -- the Coordinates of the tiles that can slide into the empty spot when it is at position p
+        self.moves = tuple(tuple(self.coords[q] for q in (p - n, p + n, p - 1 if p % n else -1, p + 1 if (p + 1) % n else -1)
+                                    if 0 <= q < cells) 
+                            for p in range(cells))
+        self.goal = sum(t << self.shifts[t] for t in range(cells))
+        # distance[t * cells + p] -- Manhattan distance of tile t at position p from its goal position
+        self.distance = tuple(abs(t // n - p // n) + abs(t % n - p % n) if t != 0 else 0
+                                for t in range(cells) for p in range(cells))
+
+    def __reduce__(self):
+        """ Pickled as just N: unpickling (e.g. in another process) gets that process's shared tables. """
+        return (_get_board_tables, (self.n,))
+
+_BOARD_TABLES : Dict[int, _BoardTables] = {}
+
+def _get_board_tables(n : int) -> _BoardTables:
+    tables = _BOARD_TABLES.get(n)
+    if tables is None:
+        tables = _BOARD_TABLES[n] = _BoardTables(n)
+    return tables
+
+# Enough for every goal order of up to 6 tiles (all lines up to 6x6)
+CONFLICTS_CACHE_SIZE = 1 << 12
+
+@lru_cache(maxsize = CONFLICTS_CACHE_SIZE)
+def _order_conflicts(goals : Tuple[int, ...]) -> int:
+    """ How many of the tiles whose goal positions along their line are goals (in their current order) must leave it
+    so that the rest are in goal order: their count minus their longest increasing subsequence.
+    """
+    tails : List[int] = [] # tails[i] is the smallest last goal position of an increasing subsequence of length i+1
+    for g in goals:
+        i = 0
+        while i < len(tails) and tails[i] < g:
+            i += 1
+        if i == len(tails):
+            tails.append(g)
+        else:
+            tails[i] = g
+    return len(goals) - len(tails)
+
+
 class SlidePuzzleState(StateNode):
-    """ A state node for the slide puzzle environment. """
+    """ A state node for the slide puzzle environment. 
+
+    The tiles are packed into a single int, board (see _BoardTables), so that hashing, comparing,
+    and the goal test are single int operations, and a move is a few shifts and adds.
+    The position of the empty spot is cached, and the tiles that can move from it are looked up in a table.
+    """
+    __slots__ = ('board', 'empty_index', 'hamming', 'manhattan', 'row_conflicts', 'col_conflicts', '_tables')
 
     # Type Hints allow for the optional type declaration of "instance variables" this way, like Java.
-    tiles : Tuple[Tuple[int, ...], ...]
-    empty_pos : Coordinate
+    board : int
+    empty_index : int # position (row * N + col) of the empty spot
+    _tables : _BoardTables
+
+    # Heuristic terms, carried by each state and updated incrementally by get_next_state.
+    hamming : int # number of tiles (not counting the empty spot) out of place
+    manhattan : int # sum of the tiles' Manhattan distances from their goal positions
+    # For each row (column), the fewest tiles that must leave the row (column) to let the others,
+    # which all belong in it, pass each other to their goal order - each costing 2 moves beyond the Manhattan distance.
+    row_conflicts : Tuple[int, ...]
+    col_conflicts : Tuple[int, ...]
     
     
     @staticmethod
@@ -80,29 +153,63 @@ class SlidePuzzleState(StateNode):
         All the arguments for StateNode's __init__; Use super.__init__() to call this function and pass appropriate parameters.
         tiles -- a tuple grid of integers representing the position of different numbered tiles
         empty_pos -- a coordinate indicating the position of the empty spot (tile 0)
+
+        The tiles are packed into board, and the heuristic terms computed from scratch. 
+        (get_next_state bypasses this, and derives both from the parent's.)
         """
         super().__init__(parent = parent, last_action = last_action, depth = depth, path_cost = path_cost)
-        self.tiles = tiles
-        self.empty_pos = empty_pos
+        n = len(tiles)
+        tables = self._tables = _get_board_tables(n)
+        cells = n * n
+        self.board = 0
+        for p in range(cells):
+            tile = tiles[p // n][p % n]
+            self.board |= tile << tables.shifts[p]
+            if tile == 0:
+                self.empty_index = p
+        self.hamming = sum(1 for p in range(cells) if self._tile(p) not in (0, p))
+        self.manhattan = sum(tables.distance[self._tile(p) * cells + p] for p in range(cells))
+        self.row_conflicts = tuple(self._line_conflicts(r, 0) for r in range(n))
+        self.col_conflicts = tuple(self._line_conflicts(c, 1) for c in range(n))
 
     """ Additional accessor methods - needed for the GUI"""
 
+    @property
+    def tiles(self) -> Tuple[Tuple[int, ...], ...]:
+        """ The tuple grid of tile numbers (unpacked from board) """
+        n = self._tables.n
+        return tuple( tuple(self._tile(r * n + c) for c in range(n)) for r in range(n))
+
+    @property
+    def empty_pos(self) -> Coordinate:
+        return self._tables.coords[self.empty_index]
+
     def get_size(self) -> int:
         """Returns the dimension N of the square puzzle represented which is N-by-N."""
-        return len(self.tiles)
+        return self._tables.n
 
     def get_tile_at(self, coord : Coordinate) -> int:
         """ Returns the number of the tile at the given Coordinate.
         If the position is empty, return 0.
         Ideally, this should be done in constant time, not O(N) or O(N^2) time...
         """
-        return self.tiles[coord.r][coord.c]
+        return self._tile(coord.r * self._tables.n + coord.c)
 
     def get_empty_pos(self) -> Coordinate:
         """Returns Coordinate of the empty tile.
         Ideally, this should be done in constant time, not O(N) or O(N^2) time...
         """
-        return self.empty_pos
+        return self._tables.coords[self.empty_index]
+
+    def get_tile_positions(self) -> List[int]:
+        """ Returns a list whose t-th item is the position (row * N + col) of tile t """
+        tables = self._tables
+        where = [0] * len(tables.shifts)
+        board, mask, width = self.board, tables.mask, tables.width
+        for p in range(len(where)):
+            where[board & mask] = p
+            board >>= width
+        return where
     
     """ Overridden methods from StateNode """
 
@@ -110,14 +217,22 @@ class SlidePuzzleState(StateNode):
     def get_state_features(self) -> Hashable:
         """Returns a full featured representation of the state. 
 
-        In the case of the slide puzzle, the current positions of all the tiles are the features.
+        In the case of the slide puzzle, the current positions of all the tiles are the features -
+        packed into the int board.
         
         If two SlidePuzzleState objects represent the same state, get_features() should return the same for both objects.
         However, two SlidePuzzleState with identical state features may not represent the same node of the search tree -
         that is, they may have different parents, last actions, path lengths/costs etc...
         """
-        return self.tiles
+        return self.board
+
+    # Override
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SlidePuzzleState) and self.board == other.board
 
+    # Override
+    def __hash__(self) -> int:
+        return hash(self.board)
     
     # Override
     def __str__(self) -> str:
@@ -135,13 +250,7 @@ class SlidePuzzleState(StateNode):
         The goal of the slide puzzle is to have the empty spot in the 0th row and 0th col,
         and then the rest of the numbered tiles in order down the rows!
         """
-        num=0
-        for row in self.tiles:
-            for col in row:
-                if(col!=num):
-                    return False
-                num+=1
-        return True
+        return self.board == self._tables.goal
     
     # Override
     def is_legal_action(self, action : Coordinate) -> bool:
@@ -154,25 +263,13 @@ class SlidePuzzleState(StateNode):
         is to be moved into the empty slot. That Coordinate needs to be not out of bounds, and 
         actually adjacent to the emty slot.
         """
-        legal=False
-        if(action.r >= len(self.tiles) or action.c >= len(self.tiles)):
-            return False
-        movableTiles=self.get_surrounding_tiles(action)
-
-        for movable in movableTiles:
-            if (movable==self.empty_pos):
-                legal=True
-        
-        return legal
+        return action in self._tables.moves[self.empty_index]
     
 
     # Override
     def get_all_actions(self) -> Iterable[Coordinate]:
         """Return all legal actions at this state."""
-
-        # TODO implement! This is a good candidate for using yield (generator function)
-        # alternatively, return a list, tuple, or use comprehension
-        return self.get_surrounding_tiles(self.empty_pos)
+        return self._tables.moves[self.empty_index]
         
 
     # Override
@@ -194,42 +291,122 @@ class SlidePuzzleState(StateNode):
 
         -- action is assumed legal (is_legal_action called before), but a ValueError may be passed for illegal actions if desired.
         """
-        newtiles=list(self.tiles)
-        i=0
-        for x in newtiles:
-            newtiles[i]=list(x)
-            i+=1
-
-        newtiles[self.empty_pos.r][self.empty_pos.c]=newtiles[action.r][action.c]
-        newtiles[action.r][action.c]=0
-
-        i=0
-        for x in newtiles:
-            newtiles[i]=tuple(x)
-            i+=1
-        newtiles=tuple(newtiles)
-
-        return SlidePuzzleState( 
-                tiles = newtiles, 
-                empty_pos =action,
-                parent = self,
-                last_action = action,
-                depth = self.depth +1,
-                path_cost = self.path_cost + 1,
-        )   
+        tables = self._tables
+        n = tables.n
+        empty = self.empty_index
+        moved = action.r * n + action.c
+        tile = (self.board >> tables.shifts[moved]) & tables.mask
+
+        # Built directly rather than by __init__, to derive everything from this state in O(1)
+        child = SlidePuzzleState.__new__(SlidePuzzleState)
+        child.parent = self
+        child.last_action = action
+        child.depth = self.depth + 1
+        child.path_cost = self.path_cost + 1
+        child._tables = tables
+        child.board = self.board - (tile << tables.shifts[moved]) + (tile << tables.shifts[empty])
+        child.empty_index = moved
+
+        # Update the heuristic terms from the one tile moved, from action to the empty spot
+        child.hamming = self.hamming + (tile != empty) - (tile != moved)
+        base = tile * n * n
+        child.manhattan = self.manhattan + tables.distance[base + empty] - tables.distance[base + moved]
+        # A vertical move changes the two rows' contents, but not the order of tiles in the column (and vice versa)
+        if moved - empty == n or empty - moved == n:
+            row_conflicts = list(self.row_conflicts)
+            row_conflicts[moved // n] = child._line_conflicts(moved // n, 0)
+            row_conflicts[empty // n] = child._line_conflicts(empty // n, 0)
+            child.row_conflicts = tuple(row_conflicts)
+            child.col_conflicts = self.col_conflicts
+        else:
+            col_conflicts = list(self.col_conflicts)
+            col_conflicts[moved % n] = child._line_conflicts(moved % n, 1)
+            col_conflicts[empty % n] = child._line_conflicts(empty % n, 1)
+            child.col_conflicts = tuple(col_conflicts)
+            child.row_conflicts = self.row_conflicts
+        return child
     
     
+    # Override
+    def get_features_bit_length(self) -> int:
+        return len(self._tables.shifts) * self._tables.width
+
+    # Override
+    def state_from_features(self, features : Hashable) -> SlidePuzzleState:
+        """ Unpacks the board (see get_state_features) into a new initial state. """
+        tables = self._tables
+        n = tables.n
+        tiles = tuple(tuple((features >> tables.shifts[r * n + c]) & tables.mask for c in range(n)) for r in range(n))
+        empty_pos = next(Coordinate(r, c) for r in range(n) for c in range(n) if tiles[r][c] == 0)
+        return SlidePuzzleState(tiles = tiles, empty_pos = empty_pos, parent = None, last_action = None, depth = 0, path_cost = 0)
+
+    # Override
+    def get_goal_states(self) -> Iterable[SlidePuzzleState]:
+        """There is only one goal: the empty spot in the 0th row and 0th col, then the rest of the tiles in order."""
+        n = self.get_size()
+        tiles = tuple( tuple(range(r * n, (r + 1) * n)) for r in range(n))
+        return [SlidePuzzleState(tiles = tiles, empty_pos = Coordinate(0, 0), 
+                                parent = None, last_action = None, depth = 0, path_cost = 0)]
+
+    # Override
+    def get_previous_states(self) -> Iterable[SlidePuzzleState]:
+        """Every move is reversible: the state before moving a tile into the empty spot is the one where 
+        that tile is moved back. The action leading here is always moving the tile now at the empty spot.
+        """
+        for action in self.get_all_actions():
+            previous = self.get_next_state(action)
+            previous.last_action = self.empty_pos
+            yield previous
+
+    def is_solvable(self) -> bool:
+        """ Returns whether the goal can be reached from this state, by parity.
+
+        Every move swaps the empty spot with an adjacent tile: a transposition of the board's permutation 
+        (counting the empty spot as tile 0) that also moves the empty spot by one row or column. So the parity
+        of the permutation and the parity of the empty spot's distance from its goal position (0, 0) change together,
+        and must already agree for the goal (the identity permutation, at distance 0) to be reachable.
+        (The converse also holds, so the check is exact.)
+        """
+        where = self.get_tile_positions()
+        # A permutation is even iff its number of elements minus number of cycles is even
+        seen = [False] * len(where)
+        cycles = 0
+        for t in range(len(where)):
+            if not seen[t]:
+                cycles += 1
+                while not seen[t]:
+                    seen[t] = True
+                    t = where[t]
+        empty = self.get_empty_pos()
+        return (len(where) - cycles) % 2 == (empty.r + empty.c) % 2
+
+    # Override
+    def check_feasibility(self) -> Optional[str]:
+        """ Returns a reason if the puzzle is not solvable (see is_solvable), or None if it is. """
+        if not self.is_solvable():
+            return "The tiles' permutation and the empty spot's distance from its goal position differ in parity."
+        return None
+
+    def get_linear_conflicts(self) -> int:
+        """ Returns the number of extra moves (beyond the Manhattan distance) that linear conflicts in rows and columns force. """
+        return 2 * (sum(self.row_conflicts) + sum(self.col_conflicts))
+
+    def _tile(self, p : int) -> int:
+        """ The tile at position p """
+        return (self.board >> self._tables.shifts[p]) & self._tables.mask
+
+    def _line_conflicts(self, index : int, axis : int) -> int:
+        """ For the tiles in row (axis 0) or column (axis 1) number index that belong in that line, returns how many must 
+        leave it so that the rest are in goal order (see _order_conflicts, which memoizes per goal order).
+        """
+        n = self._tables.n
+        line = (self._tile(index * n + i) for i in range(n)) if axis == 0 else (self._tile(i * n + index) for i in range(n))
+        # goal positions along the line of the tiles that belong in it, in their current order
+        return _order_conflicts(tuple(divmod(tile, n)[1 - axis] for tile in line if tile != 0 and divmod(tile, n)[axis] == index))
+
     def get_surrounding_tiles(self, location:Coordinate) -> Iterable[Coordinate]:
-        movableTiles=[]
-        if(location.r!=0):
-            movableTiles.append(Coordinate(location.r-1,location.c))
-        if(location.r!=len(self.tiles)-1):
-            movableTiles.append(Coordinate(location.r+1,location.c))
-        if(location.c!=0):
-            movableTiles.append(Coordinate(location.r,location.c-1))
-        if(location.c!=len(self.tiles)-1):
-            movableTiles.append(Coordinate(location.r,location.c+1))
-        return movableTiles
+        """ Returns the Coordinates of the positions adjacent to location """
+        return self._tables.moves[location.r * self._tables.n + location.c]
         
 
-    """ You may add additional methods that may be useful! """
\ No newline at end of file
+    """ You may add additional methods that may be useful! """
@@ -5,7 +5,8 @@ from os import getcwd
 from sys import argv
 from spotlessroomba_problem import *
 from spotlessroomba_heuristics import SPOTLESSROOMBA_HEURISTICS
-from search_algorithms import ALGORITHMS, STRATEGIES
+from search_algorithms import ALL_AGENTS, STRATEGIES
+from spotlessroomba_tsp import SPOTLESSROOMBA_AGENTS
 from roomba_gui import *
 from search_gui import Search_GUI_Controller
 
@@ -63,7 +64,7 @@ class SpotlessRoomba_GUI(Roomba_GUI):
         dirt_count = 1
         text_size = self.canvas.winfo_height() // (self.height * 2)
         for state, coord in zip(path[1:], path_coords[1:]):
-            if state.position in state.parent.dirty_locations:
+            if state.parent.is_dirty(state.position):
                 self.canvas.create_text(coord, fill = COLORS[TEXT], tag = TEXT,
                         text = str(dirt_count), font = ('Times New Roman', text_size, 'bold' ))
                 dirt_count += 1
@@ -78,6 +79,6 @@ if __name__ == "__main__":
         file_path = filedialog.askopenfilename(title = "Open Roomba File",initialdir = getcwd(), filetypes=[("Roomba", ".roomba"), ("Text", ".txt")])
         initroot.destroy()
     initial_state = SpotlessRoombaState.readFromFile(file_path)
-    gui = SpotlessRoomba_GUI(initial_state,algorithm_names=ALGORITHMS.keys(), strategy_names=STRATEGIES.keys(), heuristics=SPOTLESSROOMBA_HEURISTICS)
-    controller = Search_GUI_Controller(gui, initial_state, SPOTLESSROOMBA_HEURISTICS)
+    gui = SpotlessRoomba_GUI(initial_state,algorithm_names=SPOTLESSROOMBA_AGENTS.keys(), strategy_names=STRATEGIES.keys(), heuristics=SPOTLESSROOMBA_HEURISTICS)
+    controller = Search_GUI_Controller(gui, initial_state, SPOTLESSROOMBA_HEURISTICS, agents=SPOTLESSROOMBA_AGENTS)
     gui.mainloop()
\ No newline at end of file
@@ -3,6 +3,8 @@ import math
 from spotlessroomba_problem import SpotlessRoombaState
 from search_heuristics import *
 from spotlessroomba_problem import *
+from roomba_distances import maze_distances_to
+from functools import lru_cache
 
 INF = float('inf')
 
@@ -30,7 +32,7 @@ def spotlessroomba_first_heuristic(state : SpotlessRoombaState)  -> float:
     if state.is_goal_state():
         return 0
 
-    heuri = len(state.dirty_locations)
+    heuri = state.count_dirty()
 
     lowest = sys.maxsize
     for tup in state.dirty_locations:
@@ -48,7 +50,7 @@ def spotlessroomba_second_heuristic(state : SpotlessRoombaState)  -> float:
     if state.is_goal_state():
             return 0
 
-    heuri = len(state.dirty_locations)
+    heuri = state.count_dirty()
 
     lowest = sys.maxsize
     for tup in state.dirty_locations:
@@ -71,9 +73,76 @@ def silly_heuristic(state:SpotlessRoombaState) ->float:
     return 1
 
 
+# An admissible heuristic from true maze distances: to clean the remaining dirty spots, the roomba must first reach one of them
+# (at least the distance to the nearest), and then go from one to the next until all are visited - a path through 
+# all of them, which costs at least a minimum spanning tree over them. Since moving onto carpet costs more than moving off of it, 
+# maze distances are not symmetric; the tree uses the cheaper of the two directions between each pair.
+# Many states share the same dirty spots, so the tree's weight is memoized by dirty mask.
+
+class SpotDistances:
+    """ Maze distances to each (initially) dirty spot of a maze, computed once per maze by one Dijkstra search per spot. """
+    to_spot : List[List[float]] # to_spot[i][cell] is the cost from cell (row * width + col) to dirty spot i
+    between : List[List[float]] # between[i][j] is the cheaper of the costs from spot i to spot j or back
+
+    def __init__(self, dirt_index : DirtIndex, grid : Tuple[Tuple[Terrain,...],...]):
+        width = dirt_index.width
+        self.to_spot = [maze_distances_to(grid, [spot]) for spot in dirt_index.locations]
+        cells = [spot.row * width + spot.col for spot in dirt_index.locations]
+        self.between = [[min(self.to_spot[j][cells[i]], self.to_spot[i][cells[j]]) for j in range(len(cells))] 
+                        for i in range(len(cells))]
+
+_SPOT_DISTANCES : Dict[DirtIndex, SpotDistances] = {} # DirtIndexes hash by identity, one per maze
+MAX_CACHED_MAZES = 16
+MST_CACHE_SIZE = 1 << 16
+
+def get_spot_distances(state : SpotlessRoombaState) -> SpotDistances:
+    distances = _SPOT_DISTANCES.get(state.dirt_index)
+    if distances is None:
+        if len(_SPOT_DISTANCES) >= MAX_CACHED_MAZES:
+            _SPOT_DISTANCES.clear()
+        distances = _SPOT_DISTANCES[state.dirt_index] = SpotDistances(state.dirt_index, state.grid)
+    return distances
+
+def spots_in(mask : int) -> List[int]:
+    """ The indices of the set bits of mask """
+    spots = []
+    while mask:
+        low = mask & -mask
+        spots.append(low.bit_length() - 1)
+        mask ^= low
+    return spots
+
+@lru_cache(maxsize = MST_CACHE_SIZE)
+def mst_weight(distances : SpotDistances, mask : int) -> float:
+    """ The weight of a minimum spanning tree (by Prim's algorithm) over the dirty spots in mask """
+    spots = spots_in(mask)
+    between = distances.between
+    # cheapest edge from the tree to each spot not yet in it
+    edge = {j : between[spots[0]][j] for j in spots[1:]}
+    weight = 0
+    while edge:
+        j = min(edge, key = edge.get)
+        weight += edge.pop(j)
+        row = between[j]
+        for other in edge:
+            if row[other] < edge[other]:
+                edge[other] = row[other]
+    return weight
+
+def spotlessroomba_mst_heuristic(state : SpotlessRoombaState) -> float:
+    mask = state.dirty_mask
+    if mask == 0:
+        return 0
+    distances = get_spot_distances(state)
+    to_spot, position = distances.to_spot, state.position_index
+    nearest = min(to_spot[i][position] for i in spots_in(mask))
+    return nearest + mst_weight(distances, mask)
+
+
 SPOTLESSROOMBA_HEURISTICS = {"Zero" : zero_heuristic,
                         "Arbitrary": arbitrary_heuristic, 
                         "Multi-Man": spotlessroomba_first_heuristic,
                         "Multi-Ham" : spotlessroomba_second_heuristic,
-                        "Silly" : silly_heuristic
+                        "Silly" : silly_heuristic,
+                        "Maze MST" : spotlessroomba_mst_heuristic
                         }
\ No newline at end of file
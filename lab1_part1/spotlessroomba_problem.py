@@ -7,13 +7,69 @@ from roomba_problem import *
 DIRTY_TERRAIN = {FLOOR : DIRTY_FLOOR, CARPET : DIRTY_CARPET}
 CLEAN_TERRAIN = {DIRTY_FLOOR : FLOOR, DIRTY_CARPET : CARPET}
 
+class DirtIndex:
+    """
+    Numbers the (initially) dirty spots of one maze 0 to k-1, so that any set of them is an int bitmask 
+    (bit i set if spot i is still dirty). Shared by all the states of that maze.
+    """
+    width : int # of the maze, to number cells as row * width + col
+    locations : Tuple[Coordinate,...] # locations[i] is dirty spot i
+    bits : Tuple[int,...] # bits[row * width + col] is the bit (1 << i) of dirty spot i there, or 0 if not a dirty spot
+
+    def __init__(self, locations : Sequence[Coordinate], height : int, width : int):
+        self.width = width
+        self.locations = tuple(locations)
+        bits = [0] * (height * width)
+        for i, loc in enumerate(self.locations):
+            bits[loc.row * width + loc.col] = 1 << i
+        self.bits = tuple(bits)
+
+    def bit_at(self, coord : Coordinate) -> int:
+        return self.bits[coord.row * self.width + coord.col]
+
+    def mask_of(self, locations : Iterable[Coordinate]) -> int:
+        """ The bitmask of the given dirty spots """
+        mask = 0
+        for loc in locations:
+            mask |= self.bit_at(loc)
+        return mask
+
+    def __reduce__(self):
+        """ Pickled by value: unpickling (e.g. in another process) gets that process's DirtIndex for an equal maze. """
+        return (_unpickle_dirt_index, (self.locations, len(self.bits) // self.width, self.width))
+
+    def locations_in(self, mask : int) -> Tuple[Coordinate,...]:
+        """ The locations of the dirty spots in mask, in index order """
+        locations = []
+        while mask:
+            low = mask & -mask
+            locations.append(self.locations[low.bit_length() - 1])
+            mask ^= low
+        return tuple(locations)
+
+
+# DirtIndexes unpickled so far, by value, so that all the states unpickled for a maze share one
+# (and so the caches keyed by it, like the heuristics' distance tables, keep working)
+_UNPICKLED_DIRT_INDEXES : Dict[Tuple[Tuple[Coordinate,...], int, int], DirtIndex] = {}
+
+def _unpickle_dirt_index(locations : Tuple[Coordinate,...], height : int, width : int) -> DirtIndex:
+    key = (locations, height, width)
+    dirt_index = _UNPICKLED_DIRT_INDEXES.get(key)
+    if dirt_index is None:
+        if len(_UNPICKLED_DIRT_INDEXES) >= MAX_COMPILED_GRIDS:
+            _UNPICKLED_DIRT_INDEXES.clear()
+        dirt_index = _UNPICKLED_DIRT_INDEXES[key] = DirtIndex(locations, height, width)
+    return dirt_index
+
 class SpotlessRoombaState(RoombaState):
     """
     A subclass of RoombaState. The main difference is that the roomba agent's goal is to 
     reach (and clean) ALL the dirty spots, not just one of them.
     """
 
-    dirty_locations : Tuple[Coordinate,...]
+    dirty_mask : int # bitmask of the still dirty spots (see DirtIndex)
+    dirt_index : DirtIndex
+    state_key : int # the state features, packed into one int (see get_state_features)
 
     #Overridden
     @staticmethod
@@ -46,31 +102,51 @@ class SpotlessRoombaState(RoombaState):
             # Now re-do the grid with the dirty spots changed to their clean counterparts
             grid = tuple( tuple(CLEAN_TERRAIN.get(x, x) for x in row) for row in grid)
 
-            return SpotlessRoombaState(dirty_locations = tuple(dirty),
+            return SpotlessRoombaState(dirty_mask = (1 << len(dirty)) - 1,
+                                dirt_index = DirtIndex(dirty, max_r, max_c),
                                 position = Coordinate(init_r, init_c),
                                 grid = grid,
                                 parent = None,
                                 last_action = None,
                                 depth = 0,
-                                path_cost = 0)
+                                path_cost = 0,
+                                maze = CompiledGrid.of(grid))
 
 
     def __init__(self, 
-                dirty_locations : Tuple[Coordinate,...],
+                dirty_mask : int,
+                dirt_index : DirtIndex,
                 position: Coordinate, 
                 grid: Tuple[Tuple[Terrain,...],...], 
                 parent : Optional[SpotlessRoombaState], 
                 last_action: Optional[Coordinate],  #Note that actions are (relative) Coordinates!
                 depth : int, 
-                path_cost : float = 0.0) :
+                path_cost : float = 0.0,
+                maze : Optional[CompiledGrid] = None) :
         """
         Creates a SpotlessRoombaState, which represents a state of the roomba's environment .
 
         Keyword Arguments (in addition to RoombaState arguments):
-        dirty_locations -- A tuple of all the not-yet cleaned (visited) locations that are (still) dirty in the grid. 
+        dirty_mask -- A bitmask of all the not-yet cleaned (visited) locations that are (still) dirty in the grid. 
+        dirt_index -- The DirtIndex of the maze, numbering its dirty spots (the bits of dirty_mask).
         """
-        super().__init__(position = position, grid = grid, parent = parent, last_action = last_action, depth = depth, path_cost = path_cost)
-        self.dirty_locations = dirty_locations
+        super().__init__(position = position, grid = grid, parent = parent, last_action = last_action, depth = depth, path_cost = path_cost, maze = maze)
+        self.dirty_mask = dirty_mask
+        self.dirt_index = dirt_index
+        self.state_key = dirty_mask * len(self.maze.terrain) + self.position_index
+
+    @property
+    def dirty_locations(self) -> Tuple[Coordinate,...]:
+        """ A tuple of all the not-yet cleaned (visited) locations that are (still) dirty in the grid. """
+        return self.dirt_index.locations_in(self.dirty_mask)
+
+    def is_dirty(self, coord : Coordinate) -> bool:
+        """ Returns whether coord is (still) dirty, in O(1). """
+        return bool(self.dirty_mask & self.dirt_index.bit_at(coord))
+
+    def count_dirty(self) -> int:
+        """ Returns the number of dirty spots left. """
+        return bin(self.dirty_mask).count("1")
         
 
 
@@ -78,8 +154,9 @@ class SpotlessRoombaState(RoombaState):
     
     # Override   
     def get_terrain(self, coord : Coordinate) -> Terrain:
-        terrain = self.grid[coord.row][coord.col]
-        return DIRTY_TERRAIN[terrain] if coord in self.dirty_locations else terrain 
+        index = coord.row * self.maze.width + coord.col
+        terrain = self.maze.terrain[index]
+        return DIRTY_TERRAIN[terrain] if self.dirty_mask & self.dirt_index.bits[index] else terrain 
 
 
     # Override
@@ -89,14 +166,17 @@ class SpotlessRoombaState(RoombaState):
         Once again, the grid  is essentially the same for each state, except we must 
         keep track of which dirty spots have been cleaned or not yet.
 
-        Therefore, we'll use dirty_locations as a feature (plus roomba agent position), since it captures the 
+        Therefore, we'll use the dirty spots as a feature (plus roomba agent position), since it captures the 
         difference between two states sufficiently. Note that this is far more time and memory efficient 
         than using the whole grid as a feature, which must be updated for each state.
+        Both are ints - the position's cell number (row * width + col) and the bitmask of dirty spots - 
+        so they are packed into the single int state_key = dirty_mask * (number of cells) + position's cell number,
+        which is computed once per state and is much cheaper to hash and compare than a tuple.
 
         If two SpotlessRoombaStateNode objects represent the same state, get_features() should return the same for both objects.
         Note, however, that two states with identical features may have been arrived at from different paths.
         """
-        return (self.position, self.dirty_locations) 
+        return self.state_key
 
     # Override
     def __str__(self) -> str:
@@ -114,7 +194,7 @@ class SpotlessRoombaState(RoombaState):
         """Returns if a goal (terminal) state.
         If there are no more dirty locations, the roomba has finished cleaning!
         """
-        return len(self.dirty_locations) == 0
+        return self.dirty_mask == 0
 
     # Override
     def get_next_state(self, action : Coordinate) -> SpotlessRoombaState:
@@ -123,17 +203,52 @@ class SpotlessRoombaState(RoombaState):
 
         -- action is assumed legal (is_legal_action called before)
         """
-        new_pos = add(self.position, action)
-        step_cost = TRANSITION_COSTS[self.get_terrain(new_pos)]
+        maze = self.maze
+        new_index = self.position_index + action.row * maze.width + action.col
+        # Dirty and clean terrains cost the same to move onto
+        step_cost = TRANSITION_COSTS[maze.terrain[new_index]]
         # If moving onto a dirty spot, it gets cleaned!
         return SpotlessRoombaState( 
-            dirty_locations = tuple(x for x in self.dirty_locations if x != new_pos) 
-                                if new_pos in self.dirty_locations 
-                                else self.dirty_locations,
-            position = new_pos,
+            dirty_mask = self.dirty_mask & ~self.dirt_index.bits[new_index],
+            dirt_index = self.dirt_index,
+            position = maze.coords[new_index],
             grid = self.grid, 
             last_action = action,
             parent = self,
             depth = self.depth + 1,
-            path_cost = self.path_cost + step_cost)
+            path_cost = self.path_cost + step_cost,
+            maze = maze)
+
+    # Override
+    def check_feasibility(self) -> Optional[str]:
+        """Returns a reason if some dirty spot can't be reached from the roomba's position, or None otherwise."""
+        reachable = self.get_reachable_positions()
+        unreachable = [pos for pos in self.dirty_locations if pos not in reachable]
+        if unreachable:
+            return "{} dirty spot(s) can't be reached from the roomba's position: {}".format(
+                len(unreachable), ", ".join(str(pos) for pos in unreachable))
+        return None
+
+    # Override
+    def get_features_bit_length(self) -> int:
+        return max(1, ((1 << len(self.dirt_index.locations)) * len(self.maze.terrain) - 1).bit_length())
 
+    # Override
+    def state_from_features(self, features : Hashable) -> SpotlessRoombaState:
+        """ Unpacks state_key (see get_state_features) into a new initial state. """
+        dirty_mask, position_index = divmod(features, len(self.maze.terrain))
+        return SpotlessRoombaState(dirty_mask = dirty_mask, dirt_index = self.dirt_index, 
+                                position = self.maze.coords[position_index], grid = self.grid, 
+                                parent = None, last_action = None, depth = 0, path_cost = 0, maze = self.maze)
+
+    # Override
+    def get_goal_states(self) -> Iterable[SpotlessRoombaState]:
+        """Not supported: any position with nothing left dirty is a goal, and which spots were dirty
+        before each move can't be recovered from a state - so unlike RoombaState, this problem isn't searched backward.
+        """
+        raise NotImplementedError
+
+    # Override
+    def get_previous_states(self) -> Iterable[SpotlessRoombaState]:
+        """Not supported; see get_goal_states."""
+        raise NotImplementedError
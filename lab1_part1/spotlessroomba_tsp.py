@@ -0,0 +1,140 @@
+from __future__ import annotations
+from typing import List, Tuple, Sequence, Optional, Callable, Union, Dict, Type
+
+from roomba_problem import Coordinate, TRANSITION_COSTS
+from spotlessroomba_problem import SpotlessRoombaState
+from roomba_distances import maze_paths_from
+from search_algorithms import GoalSearchAgent, ALL_AGENTS, no_callback, get_callback
+"""
+A dedicated solver for SpotlessRoombaState, treating it as a Traveling Salesman Problem.
+
+Searching the state space directly means searching positions x 2^k dirty-spot subsets.
+But any solution is just an order in which to first visit the k dirty spots, going between consecutive ones
+by a cheapest maze path. So: one Dijkstra search from the start and from every dirty spot gives the
+matrix of maze distances between them, and the Held-Karp dynamic program finds the cheapest order
+exactly, in O(2^k * k^2) time - with no dependence on the size of the maze.
+"""
+
+INF = float('inf')
+
+# Held-Karp's time and memory grow as 2^k * k^2 and 2^k * k; beyond this many dirty spots, it is not attempted.
+# (In pure Python, 15 spots take about a second and ~10 MB; each more spot doubles that, and 20 take minutes and hundreds of MB.)
+MAX_HELD_KARP_SPOTS = 15
+
+
+def held_karp(start_distances : Sequence[float], distances : Sequence[Sequence[float]]) -> Tuple[float, List[int]]:
+    """ Returns the cost and order of the cheapest path that starts outside the spots, and visits every spot once
+    (without returning). start_distances[j] is the cost from the start to spot j, and distances[i][j] from spot i to spot j.
+
+    best[mask * k + j] is the lowest cost to visit exactly the spots in mask (a bitmask), ending at spot j.
+    """
+    k = len(start_distances)
+    if k == 0:
+        return 0, []
+    full = (1 << k) - 1
+    best = [INF] * ((1 << k) * k)
+    came_from = [-1] * ((1 << k) * k)
+    for j in range(k):
+        best[(1 << j) * k + j] = start_distances[j]
+    for mask in range(1, full + 1):
+        base = mask * k
+        for i in range(k):
+            cost = best[base + i]
+            if cost == INF:
+                continue
+            row = distances[i]
+            remaining = full ^ mask
+            while remaining:
+                low = remaining & -remaining
+                remaining ^= low
+                j = low.bit_length() - 1
+                new_cost = cost + row[j]
+                index = (mask | low) * k + j
+                if new_cost < best[index]:
+                    best[index] = new_cost
+                    came_from[index] = i
+
+    last = min(range(k), key = lambda j: best[full * k + j])
+    cost = best[full * k + last]
+    order = []
+    mask = full
+    while last != -1:
+        order.append(last)
+        last, mask = came_from[mask * k + last], mask ^ (1 << last)
+    order.reverse()
+    return cost, order
+
+
+class HeldKarpSearch(GoalSearchAgent):
+    """ Solves SpotlessRoombaStates optimally by Held-Karp over the dirty spots (see above), for up to
+    MAX_HELD_KARP_SPOTS dirty spots.
+
+    The tour is expanded back into a path of SpotlessRoombaStates (by get_next_state), so the returned
+    solution is the same kind of state node any other agent returns.
+    total_extends counts the cells settled by the Dijkstra searches; total_enqueues counts the steps of the final path.
+    The heuristic is ignored.
+
+    If the roomba starts on a dirty spot, that spot is only cleaned by moving back onto it: visiting it first
+    costs the cheapest step off to a neighbor and back, and visiting it later costs the maze distance back to the start.
+    """
+
+    def search(self,
+            initial_state : SpotlessRoombaState,
+            gui_callback_fn : Callable[[SpotlessRoombaState],bool] = no_callback,
+            cutoff : Union[int, float] = INF
+            ) -> Optional[SpotlessRoombaState]:
+        """ Returns the cheapest solution from initial_state, or None if a dirty spot is unreachable,
+        the solution costs at least cutoff (as other agents cut off such paths), or gui_callback_fn returns True for a state along the path.
+        """
+        callback = get_callback(gui_callback_fn)
+        spots = initial_state.dirty_locations
+        k = len(spots)
+        if k > MAX_HELD_KARP_SPOTS:
+            raise ValueError("{} dirty spots is too many for Held-Karp (at most {})".format(k, MAX_HELD_KARP_SPOTS))
+        width = initial_state.get_width()
+        cells = [p.row * width + p.col for p in spots]
+
+        # One Dijkstra search from the start and from each spot
+        start_dist, start_previous = maze_paths_from(initial_state.grid, initial_state.position)
+        paths = [maze_paths_from(initial_state.grid, p) for p in spots]
+        self.total_extends += sum(1 for d in start_dist if d < INF) + sum(1 for dist, _ in paths for d in dist if d < INF)
+        start_distances = [start_dist[c] for c in cells]
+        distances = [[dist[c] for c in cells] for dist, _ in paths]
+        start_cell, step_back = initial_state.position_index, -1
+        if start_cell in cells:
+            # Starting on a dirty spot: to visit it first, step off to the cheapest neighbor (one reached directly) and back
+            neighbors = [c for c, p in enumerate(start_previous) if p == start_cell]
+            start_distances[cells.index(start_cell)] = INF
+            if neighbors:
+                step_back = min(neighbors, key = lambda c: start_dist[c])
+                start_distances[cells.index(start_cell)] = start_dist[step_back] + TRANSITION_COSTS[initial_state.maze.terrain[start_cell]]
+
+        cost, order = held_karp(start_distances, distances)
+        if cost == INF or cost >= cutoff:
+            return None
+
+        # Expand the tour into states, leg by leg
+        state = initial_state
+        for leg, j in enumerate(order):
+            previous = start_previous if leg == 0 else paths[order[leg - 1]][1]
+            cell, leg_cells = cells[j], []
+            while cell != -1:
+                leg_cells.append(cell)
+                cell = previous[cell]
+            leg_cells.reverse()
+            if leg == 0 and cells[j] == start_cell:
+                leg_cells = [start_cell, step_back, start_cell]
+            for a, b in zip(leg_cells, leg_cells[1:]):
+                (ra, ca), (rb, cb) = divmod(a, width), divmod(b, width)
+                state = state.get_next_state(Coordinate(rb - ra, cb - ca))
+                self.total_enqueues += 1
+                if callback is not None and callback(state):
+                    return None
+        return state
+
+
+# The agents for the spotless roomba problem: all the general ones, plus Held-Karp - except bidirectional search,
+# since SpotlessRoombaState can't search backward (get_goal_states and get_previous_states aren't implemented).
+SPOTLESSROOMBA_AGENTS : Dict[str, Dict[str, Type[GoalSearchAgent]]] = {algorithm : strategies 
+    for algorithm, strategies in ALL_AGENTS.items() if algorithm != "bidirectional"}
+SPOTLESSROOMBA_AGENTS["held-karp"] = {"tsp": HeldKarpSearch}